@@ -1,11 +1,9 @@
 import logging
 import argparse
 import os
-# import threading
-import multiprocessing as mp
-import time
 import yaml
 import kenzy.core
+from kenzy.supervisor import Supervisor, LocalTransport
 from kenzy.extras import clean_string, apply_vars, get_raw_value
 from . import __app_title__, __version__
 from . import settings
@@ -14,14 +12,18 @@ global service
 services = []
 
 
-def startup(cfg):
+def startup(cfg, local_inboxes=None):
     app_type = str(clean_string(cfg.get("type"))).replace("..", ".").replace("/", "").replace("\\", "").replace("-", "_")
 
     if app_type not in ["kenzy.core"]:
         exec(f"import {app_type}")
 
     device = eval(f"{app_type}.device(**cfg.get('device', dict()))")
-    service = kenzy.core.KenzyHTTPServer(**cfg.get('service', dict()))
+    if str(cfg.get('service', dict()).get("engine", "thread")).lower().strip() == "async":
+        from kenzy.aio import KenzyAsyncHTTPServer
+        service = KenzyAsyncHTTPServer(**cfg.get('service', dict()))
+    else:
+        service = kenzy.core.KenzyHTTPServer(**cfg.get('service', dict()))
 
     # Interlinking objects
     device.set_service(service)      # Tell device about service wrapper
@@ -29,6 +31,10 @@ def startup(cfg):
     service.set_device(device)       # Add device to service
     services.insert(0, service)
 
+    if local_inboxes is not None:
+        service.set_local_transport(LocalTransport(local_inboxes, port=cfg.get("service", dict()).get("port"),
+                                                   timeout=cfg.get("service", dict()).get("local.timeout", 30)))
+
     device.start()
 
     try:
@@ -127,7 +133,15 @@ cfg = settings.load(config_file)
 
 if str(cfg.get("type", "")).lower() in ["multi", "multiple", "many"]:
     # Multiple
-    thread_pool = []
+    sv_cfg = cfg.get("supervisor", {})
+    supervisor = Supervisor(
+        startup,
+        restart=sv_cfg.get("restart", True),
+        backoff=sv_cfg.get("backoff", 1.0),
+        backoff_max=sv_cfg.get("backoff_max", 60),
+        stable_time=sv_cfg.get("stable_time", 60),
+        transport=sv_cfg.get("transport", "local")
+    )
     
     last_port = 0
 
@@ -136,7 +150,7 @@ if str(cfg.get("type", "")).lower() in ["multi", "multiple", "many"]:
     defaults["service"] = defaults.get("server", {})
 
     for grp in cfg:
-        if str(grp).lower() in ["type", "default"]:
+        if str(grp).lower() in ["type", "default", "supervisor"]:
             continue
 
         cfg[grp]["device"] = cfg[grp].get("device", {})
@@ -172,35 +186,11 @@ if str(cfg.get("type", "")).lower() in ["multi", "multiple", "many"]:
 
         cfg[grp]["service"]["port"] = port
 
-        p = mp.Process(target=startup, args=[cfg.get(grp)])
-        p.start()
-        thread_pool.append(p)
-
-        # t = threading.Thread(target=startup, args=[cfg.get(grp)], daemon=True)
-        # t.start()
-        # thread_pool.append(t)
+        # Let the main server get fully online first
+        supervisor.add(grp, cfg.get(grp), delay=1 if grp_type == "kenzy.skillmanager" else 0)
 
-        if grp_type == "kenzy.skillmanager":
-            # Let the main server get fully online first
-            time.sleep(1)
-
-    while True:
-        alive = False
-        try:
-            for item in thread_pool:
-                item.join()
-        except KeyboardInterrupt:
-            for item in services:
-                item.shutdown()
-
-        for item in thread_pool:
-            if item.is_alive():
-                alive = True
-
-        if not alive:
-            break
-
-        time.sleep(.5)
+    supervisor.start()
+    supervisor.run()
 
 else:
 
@@ -0,0 +1,386 @@
+import asyncio
+import concurrent.futures
+import http.client
+import io
+import json
+import logging
+import ssl
+import sys
+import traceback
+from urllib.parse import urlsplit
+from .core import KenzyHTTPServer
+from . import __app_title__, __version__
+
+# Same request limits as http.server
+MAX_LINE = 65536
+MAX_HEADERS = 100
+
+
+class KenzyAsyncHTTPClient:
+    """
+    Keep-alive HTTP/1.1 client built on asyncio streams so outbound requests never hold a thread.
+
+    Args:
+        pool_size (int): Maximum number of idle connections kept open per destination.
+        verify (bool): Verify SSL certificates.
+    """
+
+    logger = logging.getLogger("HTTP-ACLT")
+
+    def __init__(self, pool_size=10, verify=False):
+        self.pool_size = int(pool_size)
+        self.connections = {}
+        self.counters = {}
+
+        self.ssl_context = ssl.create_default_context()
+        if not verify:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+
+    async def _connect(self, dest, parts):
+        port = parts.port if parts.port is not None else (443 if parts.scheme == "https" else 80)
+        ssl_context = self.ssl_context if parts.scheme == "https" else None
+
+        reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=ssl_context)
+        self.counters[dest]["connections"] += 1
+
+        return reader, writer
+
+    def _get_idle(self, dest):
+        idle = self.connections.get(dest, [])
+        while len(idle) > 0:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+
+            writer.close()
+
+        return None
+
+    def _release(self, dest, conn, keep_alive=True):
+        idle = self.connections.setdefault(dest, [])
+        if keep_alive and len(idle) < self.pool_size:
+            idle.append(conn)
+        else:
+            conn[1].close()
+
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by remote host")
+
+        status = int(status_line.decode("iso-8859-1").split()[1])
+
+        raw = b""
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            raw += line
+
+        headers = http.client.parse_headers(io.BytesIO(raw + b"\r\n"))
+
+        if str(headers.get("Transfer-Encoding", "")).lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                body += await reader.readexactly(size)
+                await reader.readline()
+        elif headers.get("Content-Length") is not None:
+            body = await reader.readexactly(int(headers.get("Content-Length")))
+        else:
+            body = await reader.read()
+
+        keep_alive = str(headers.get("Connection", "")).lower() != "close"
+        return status, body, keep_alive
+
+    async def _exchange(self, conn, request):
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+        return await self._read_response(reader)
+
+    async def post(self, url, json_data=None, headers=None, timeout=None):
+        """
+        Posts a JSON body and returns the HTTP status code and decoded JSON response (or None).
+        """
+
+        parts = urlsplit(str(url))
+        dest = "%s://%s" % (parts.scheme, parts.netloc)
+        self.counters.setdefault(dest, { "requests": 0, "connections": 0, "errors": 0 })
+        self.counters[dest]["requests"] += 1
+
+        path = parts.path if parts.path != "" else "/"
+        if parts.query != "":
+            path += "?" + parts.query
+
+        body = json.dumps(json_data).encode("utf-8")
+
+        request = f"POST {path} HTTP/1.1\r\n"
+        request += f"Host: {parts.netloc}\r\n"
+        request += f"User-Agent: {__app_title__}/{__version__}\r\n"
+        request += "Connection: keep-alive\r\n"
+        request += f"Content-Length: {len(body)}\r\n"
+        if isinstance(headers, dict):
+            for key in headers:
+                request += f"{key}: {headers[key]}\r\n"
+        request += "\r\n"
+        request = request.encode("iso-8859-1") + body
+
+        conn = None
+        try:
+            conn = self._get_idle(dest)
+            if conn is not None:
+                try:
+                    status, resp_body, keep_alive = await asyncio.wait_for(self._exchange(conn, request), timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # Idle connection was dropped by the remote host; retry once on a fresh connection
+                    conn[1].close()
+                    conn = None
+
+            if conn is None:
+                conn = await asyncio.wait_for(self._connect(dest, parts), timeout)
+                status, resp_body, keep_alive = await asyncio.wait_for(self._exchange(conn, request), timeout)
+
+        except Exception:
+            self.counters[dest]["errors"] += 1
+            if conn is not None:
+                conn[1].close()
+            raise
+
+        self._release(dest, conn, keep_alive=keep_alive)
+
+        try:
+            return status, json.loads(resp_body.decode("utf-8")) if len(resp_body) > 0 else None
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return status, None
+
+    def get_metrics(self):
+        ret = { "requests": 0, "connections": 0, "errors": 0, "reuse_rate": 0.0, "destinations": {} }
+
+        for dest in list(self.counters.keys()):
+            item = dict(self.counters[dest])
+            item["reuse_rate"] = round(1.0 - (float(item["connections"]) / item["requests"]), 4) if item["requests"] > 0 else 0.0
+            ret["destinations"][dest] = item
+
+            ret["requests"] += item["requests"]
+            ret["connections"] += item["connections"]
+            ret["errors"] += item["errors"]
+
+        if ret["requests"] > 0:
+            ret["reuse_rate"] = round(1.0 - (float(ret["connections"]) / ret["requests"]), 4)
+
+        return ret
+
+    async def close(self):
+        for dest in list(self.connections.keys()):
+            for reader, writer in self.connections[dest]:
+                writer.close()
+
+        self.connections = {}
+
+
+class KenzyAsyncHTTPServer(KenzyHTTPServer):
+    """
+    KenzyHTTPServer variant that serves requests as coroutines on a single asyncio event loop.
+
+    Device commands are still dispatched through command()/authenticate() but run on a bounded
+    worker pool (async.workers) instead of one OS thread per request.  Non-blocking outbound
+    requests (e.g. collect) are sent through KenzyAsyncHTTPClient on the same event loop.
+    Request bodies larger than async.max_body bytes are rejected.
+    """
+
+    logger = logging.getLogger("HTTP-AIO")
+
+    def __init__(self, **kwargs) -> None:
+        self.loop = None
+        self.ssl_context = None
+        self.async_server = None
+        self.stop_requested = None
+
+        super().__init__(**kwargs)
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=int(kwargs.get("async.workers", 8)))
+        self.max_body = int(kwargs.get("async.max_body", 10 * 1024 * 1024))
+        self.async_client = KenzyAsyncHTTPClient(pool_size=kwargs.get("client.pool_size", 10))
+
+    def enable_ssl(self, cert_file, key_file):
+        self.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.ssl_context.load_cert_chain(certfile=cert_file, keyfile=key_file)
+
+    async def _write_response(self, writer, code, content_type, content, headers=None, keep_alive=True):
+        response = f"HTTP/1.1 {code} {http.client.responses.get(code, '')}\r\n"
+        response += f"Server: {__app_title__}/{__version__}\r\n"
+        if content_type is not None:
+            response += f"Content-type: {content_type}\r\n"
+
+        if isinstance(headers, dict):
+            for key in headers:
+                response += f"{key}: {headers[key]}\r\n"
+
+        response += f"Content-Length: {len(content)}\r\n"
+        response += "Connection: %s\r\n" % ("keep-alive" if keep_alive else "close")
+        response += "\r\n"
+
+        writer.write(response.encode("iso-8859-1") + content)
+        await writer.drain()
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        peer = peer[0] if isinstance(peer, tuple) else str(peer)
+
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), timeout=self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:
+                    await self._write_response(writer, 414, "text/plain", b"Request-URI Too Long", keep_alive=False)
+                    break
+
+                if not request_line:
+                    break
+
+                request_line = request_line.decode("iso-8859-1").rstrip("\r\n")
+                if request_line == "":
+                    continue
+
+                items = request_line.split()
+                if len(items) != 3:
+                    await self._write_response(writer, 400, "text/plain", b"Bad Request", keep_alive=False)
+                    break
+
+                method, path, version = items
+
+                # Line length is capped by the stream limit set in _serve()
+                lines = []
+                try:
+                    while len(lines) <= MAX_HEADERS:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        lines.append(line)
+                except ValueError:
+                    await self._write_response(writer, 431, "text/plain", b"Header Line Too Long", keep_alive=False)
+                    break
+
+                if len(lines) > MAX_HEADERS:
+                    await self._write_response(writer, 431, "text/plain", b"Too Many Headers", keep_alive=False)
+                    break
+
+                headers = http.client.parse_headers(io.BytesIO(b"".join(lines) + b"\r\n"))
+                try:
+                    content_length = int(headers.get("Content-Length", 0) or 0)
+                except ValueError:
+                    content_length = -1
+
+                if content_length < 0:
+                    await self._write_response(writer, 400, "text/plain", b"Bad Request", keep_alive=False)
+                    break
+
+                if content_length > self.max_body:
+                    await self._write_response(writer, 413, "text/plain", b"Payload Too Large", keep_alive=False)
+                    break
+
+                payload = await reader.readexactly(content_length) if content_length > 0 else b""
+
+                conn_header = str(headers.get("Connection", "")).lower()
+                keep_alive = conn_header == "keep-alive" if version == "HTTP/1.0" else conn_header != "close"
+
+                try:
+                    # Both run on the worker pool; GET may stat and read dashboard files (web.watch)
+                    if method == "GET":
+                        result = await asyncio.get_running_loop().run_in_executor(self.executor, self.process_get, path, headers)
+                    elif method == "POST":
+                        result = await asyncio.get_running_loop().run_in_executor(self.executor, self.process_post, payload, headers)
+                    else:
+                        result = (501, "text/plain", b"Unsupported method", {})
+
+                except Exception:
+                    self.logger.debug(str(sys.exc_info()[0]))
+                    self.logger.debug(str(traceback.format_exc()))
+                    result = (500, "text/plain", b"An internal error occurred", {})
+
+                self.logger.debug(f"{peer} - \"{request_line}\" {result[0]} - {headers.get('User-Agent')}")
+                await self._write_response(writer, *result, keep_alive=keep_alive)
+
+                if not keep_alive:
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def _serve(self):
+        self.stop_requested = asyncio.Event()
+
+        # Serve from a duplicate so the base shutdown() can close self.socket independently
+        sock = self.socket.dup()
+        sock.setblocking(False)
+
+        self.async_server = await asyncio.start_server(self._handle_connection, sock=sock, ssl=self.ssl_context, limit=MAX_LINE + 1)
+
+        async with self.async_server:
+            await self.stop_requested.wait()
+
+        await self.async_client.close()
+
+    def serve_forever(self, poll_interval: float = 0.5, *args, **kwargs):
+        self._start_services()
+
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    def _stop_serving(self):
+        if self.loop is not None and not self.loop.is_closed() and self.stop_requested is not None:
+            self.loop.call_soon_threadsafe(self.stop_requested.set)
+
+        self.executor.shutdown(wait=False)
+
+    def _submit_request(self, payload, headers=None, url=None, timeout=None):
+        if self.local_transport is not None and self.local_transport.has(url if url is not None else self.service_url):
+            super()._submit_request(payload, headers=headers, url=url, timeout=timeout)
+        elif self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._send_request_async(payload, headers=headers, url=url, timeout=timeout), self.loop)
+        else:
+            super()._submit_request(payload, headers=headers, url=url, timeout=timeout)
+
+    async def _send_request_async(self, payload, headers=None, url=None, timeout=None):
+        if not isinstance(payload, dict):
+            return False
+
+        try:
+            payload, headers, url = self._prepare_request(payload, headers=headers, url=url)
+            status, response_data = await self.async_client.post(url, json_data=payload, headers=headers, timeout=timeout)
+            self.logger.debug(f"Response: {response_data}")
+
+        except asyncio.TimeoutError:
+            self.logger.error("Request timed out")
+            self.logger.debug(f"Timeout error: url={url} action={payload.get('action')}")
+            return False
+        except (ConnectionError, OSError):
+            self.logger.error("Request connection error")
+            self.logger.debug(f"Connection error: url={url} action={payload.get('action')}")
+            return False
+        except Exception:
+            self.logger.debug(str(sys.exc_info()[0]))
+            self.logger.debug(str(traceback.format_exc()))
+            self.logger.error("An error occurred")
+            return False
+
+        return True
+
+    def get_metrics(self):
+        ret = super().get_metrics()
+        ret["async_client"] = self.async_client.get_metrics()
+        return ret
@@ -10,13 +10,14 @@ from socketserver import ThreadingMixIn
 import ssl
 from urllib.parse import parse_qs
 import requests
-# from requests.adapters import HTTPAdapter
 import urllib3
 import threading
 import time
 import concurrent.futures
+import types
 from . import VERSION, __app_name__, __app_title__, __version__
-from .extras import SSDPServer, discover_ssdp_services, get_file, get_local_ip_address, GenericCommand
+from .extras import SSDPServer, discover_ssdp_services, get_local_ip_address, GenericCommand, KenzyHTTPClient, StaticAssetCache, \
+    SystemMonitor, get_delta, apply_delta
         
 
 class RegisterCommand(GenericCommand):
@@ -27,28 +28,134 @@ class RegisterCommand(GenericCommand):
 
 class KenzyContext:
 
-    def __init__(self, url=None, type=None, location=None, group=None):
+    def __init__(self, url=None, type=None, location=None, group=None, camera=None):
         self.url = url
         self.type = type
         self.location = location
         self.group = group
+        self.camera = camera
 
     def to_json(self):
         return self.get()
 
     def get(self):
-        return {
+        ret = {
             "url": self.url,
             "type": self.type,
             "location": self.location,
             "group": self.group
         }
+
+        if self.camera is not None:
+            ret["camera"] = self.camera
+
+        return ret
     
     def load(self, data):
         self.url = data.get("url")
         self.type = data.get("type")
         self.location = data.get("location")
         self.group = data.get("group")
+        self.camera = data.get("camera")
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Builds a context from its dictionary form, ignoring keys this version doesn't know about.
+        """
+
+        ctx = KenzyContext()
+        ctx.load(data)
+        return ctx
+
+
+class DeviceRegistry(dict):
+    """
+    Remote devices keyed by URL with secondary indexes by location, group, type and accepted action.
+
+    Entries must be added/removed with item assignment, del, or pop() so the indexes stay current.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.RLock()
+        self.indexes = { "location": {}, "group": {}, "type": {}, "action": {} }
+
+    @staticmethod
+    def _index_keys(data):
+        keys = [("location", data.get("location")), ("group", data.get("group")), ("type", data.get("type", "unknown"))]
+        accepts = data.get("accepts", [])
+        if isinstance(accepts, list):
+            keys.extend([("action", x) for x in accepts])
+
+        return keys
+
+    def _index(self, url, data):
+        for index, value in self._index_keys(data):
+            self.indexes[index].setdefault(value, set()).add(url)
+
+    def _unindex(self, url, data):
+        for index, value in self._index_keys(data):
+            urls = self.indexes[index].get(value)
+            if urls is not None:
+                urls.discard(url)
+                if len(urls) == 0:
+                    del self.indexes[index][value]
+
+    def __setitem__(self, url, data):
+        with self.lock:
+            if url in self:
+                self._unindex(url, dict.__getitem__(self, url))
+
+            super().__setitem__(url, data)
+            self._index(url, data)
+
+    def __delitem__(self, url):
+        with self.lock:
+            self._unindex(url, dict.__getitem__(self, url))
+            super().__delitem__(url)
+
+    def pop(self, url, *args):
+        with self.lock:
+            if url in self:
+                self._unindex(url, dict.__getitem__(self, url))
+
+            return super().pop(url, *args)
+
+    def clear(self):
+        with self.lock:
+            super().clear()
+            for index in self.indexes:
+                self.indexes[index] = {}
+
+    def find(self, location=None, group=None, type=None, action=None, active=None):
+        """
+        Returns the sorted URLs of devices matching every supplied filter.
+        """
+
+        with self.lock:
+            matches = None
+            for index, value in [("location", location), ("group", group), ("type", type), ("action", action)]:
+                if value is None:
+                    continue
+
+                urls = self.indexes[index].get(value, set())
+                matches = set(urls) if matches is None else matches & urls
+
+            if matches is None:
+                matches = set(self.keys())
+
+            if active is not None:
+                matches = [x for x in matches if bool(dict.__getitem__(self, x).get("active", False)) == active]
+
+            return sorted(matches)
+
+    def count(self, type=None):
+        with self.lock:
+            if type is None:
+                return len(self)
+
+            return len(self.indexes["type"].get(type, ()))
 
 
 class KenzyRequest:
@@ -108,6 +215,15 @@ class KenzyErrorResponse(KenzyResponse):
 
 class KenzyRequestHandler(BaseHTTPRequestHandler):
     logger = logging.getLogger("HTTP-REQ")
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately; without TCP_NODELAY keep-alive responses stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Idle keep-alive connections are closed after this many seconds
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
 
     def log_message(self, format, *args):
         # if self.path.lower() != "/upnp.xml":
@@ -119,81 +235,27 @@ class KenzyRequestHandler(BaseHTTPRequestHandler):
         except AttributeError:
             pass
 
-    def set_vars(self, content):
-        return content.replace(
-            b"{service_url}", 
-            self.server.service_url.encode()
-        ).replace(
-            b"{server_uuid}", 
-            self.server.settings.get("id", "").encode()
-        ).replace(
-            b"{VERSION}", 
-            ".".join([str(x) for x in VERSION]).encode()
-        ).replace(
-            b"{APP_NAME}", 
-            __app_name__.encode()
-        ).replace(
-            b"{APP_TITLE}", 
-            __app_title__.encode()
-        )
+    def send_body(self, code=200, content_type="application/json", content=b"", headers=None):
+        self.send_response(code)
+        if content_type is not None:
+            self.send_header('Content-type', content_type)
 
-    def send_file(self, file_name=None):
-        try:
-            file_path = self.path if file_name is None else file_name
-            mime_type, content = get_file(file_path)
-
-            if mime_type is None and content is None:
-                self.send_response(404)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'File Not Found')
-                return
-
-            if file_path.lower().endswith("upnp.xml") or file_path.lower().endswith(".html"):
-                content = self.set_vars(content)
-
-            self.send_response(200)
-            self.send_header('Content-type', mime_type)
-            self.end_headers()
+        if isinstance(headers, dict):
+            for key in headers:
+                self.send_header(key, headers[key])
+
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+
+        if len(content) > 0:
             self.wfile.write(content)
-            self.wfile.flush()
 
-        except BrokenPipeError:
-            pass
-        
-        except Exception as e:
-            self.send_error(500, str(e))
-            self.logger.debug(str(sys.exc_info()[0]))
-            self.logger.debug(str(traceback.format_exc()))
+        self.wfile.flush()
 
     def do_GET(self):
         try:
-
-            if self.server.local_url != self.server.service_url and not self.path.lower().startswith("/api/"):
-                self.send_response(302)    
-                self.send_header('Location', self.server.service_url.rstrip("/") + self.path)
-                self.end_headers()
-                return
-
-            if self.path.lower() == "/" or self.path.lower().startswith("/admin/") or self.path.lower() == "/admin":
-                self.send_response(302)    
-                self.send_header('Location', '/index.html')
-                self.end_headers()
-                return
-
-            # Yeah, I know... but it works with most browsers
-            if self.path == "/favicon.ico":
-                self.path = "/favicon.svg"
-            
-            if not self.path.lower().startswith("/api/"):
-                self.send_file(self.path)
-                return
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(b"<html><head><title>Error: Unsupported Request</title></head><body>")
-            self.wfile.write(b"<h1>Unsupported Request</h1><p>Please use POST for data transmission.</p></body></html>")
+            code, content_type, content, headers = self.server.process_get(self.path, self.headers)
+            self.send_body(code, content_type, content, headers)
 
         except BrokenPipeError:
             pass
@@ -209,78 +271,13 @@ class KenzyRequestHandler(BaseHTTPRequestHandler):
 
     def do_POST(self):
         try:
-            content_type = self.headers['Content-Type']
             content_length = int(self.headers['Content-Length'])
 
-            if not self.server.authenticate(self.headers["Authorization"]):
-                response_data = KenzyResponse("failed", None, "Unauthorized").get()
-                response_body = json.dumps(response_data).encode('utf-8')
-
-                # Send response status code
-                self.send_response(200)
-
-                # Send headers
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-
-                # Send response body
-                self.wfile.write(response_body)
-                return
-
+            # Always drain the body so the connection can be reused for the next request
             payload = self.rfile.read(content_length)
 
-            if content_type.startswith('application/json'):
-                try:
-                    data = json.loads(payload.decode('utf-8'))
-                    # Process the JSON data as needed
-                    if not isinstance(data, dict):
-                        response_data = KenzyResponse("failed", None, "Invalid request")
-                    else:
-                        context = KenzyContext()
-                        if isinstance(data.get("context"), dict):
-                            context = KenzyContext(**data.get("context"))
-
-                        if data.get("action") is not None:
-                            response_data = self.server.command(data.get("action"), data.get("payload"), context)
-                            if not isinstance(response_data, KenzyResponse):
-                                logging.error(str(response_data))
-                                response_data = KenzyErrorResponse("Unrecognized response from device.")
-                        else:
-                            response_data = KenzyResponse("failed", None, "Unrecognized request")
-
-                    response_body = json.dumps(response_data.get()).encode('utf-8')
-
-                    # Send response status code
-                    self.send_response(200)
-
-                    # Send headers
-                    self.send_header('Content-type', 'application/json')
-                    self.end_headers()
-
-                    # Send response body
-                    self.wfile.write(response_body)
-                except json.JSONDecodeError:
-                    self.send_error(400, "Invalid JSON payload")
-
-            elif content_type.startswith('multipart/form-data'):
-                # Parse the multipart/form-data payload
-                form_data = parse_qs(payload.decode('utf-8'))
-                # Process the form data as needed
-                response_data = {'message': 'Received form data', 'data': form_data}
-                response_body = json.dumps(response_data).encode('utf-8')
-
-                # Send response status code
-                self.send_response(200)
-
-                # Send headers
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-
-                # Send response body
-                self.wfile.write(response_body)
-
-            else:
-                self.send_error(415, "Unsupported Media Type")
+            code, content_type, content, headers = self.server.process_post(payload, self.headers)
+            self.send_body(code, content_type, content, headers)
 
         except BrokenPipeError:
             pass
@@ -294,10 +291,13 @@ class KenzyRequestHandler(BaseHTTPRequestHandler):
 class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
     logger = logging.getLogger("HTTP-SRV")
 
+    # Pooled peers hold keep-alive connections open; daemon handler threads let shutdown and exit skip waiting on them
+    daemon_threads = True
+
     def __init__(self, **kwargs) -> None:
         self.device = None
         self.ssdp_server = None
-        self.remote_devices = {}
+        self.remote_devices = DeviceRegistry()
         self.restart_event = threading.Event()
         self.restart_thread = None
         self.register_event = threading.Event()
@@ -315,6 +315,43 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
         self.service_url = kwargs.get("service_url")
         self.id = kwargs.get("id", uuid.uuid4())
         self.api_key = kwargs.get("api_key")
+        self.keepalive_timeout = float(kwargs.get("keepalive.timeout", 30))
+
+        self.http_client = KenzyHTTPClient(
+            pool_size=kwargs.get("client.pool_size", 10),
+            retries=kwargs.get("client.retries", 1),
+            backoff=kwargs.get("client.backoff", 0.2)
+        )
+
+        self.local_transport = None
+
+        self.batch_enabled = bool(kwargs.get("collect.batch.enabled", False))
+        self.batch_window = float(kwargs.get("collect.batch.window", 0.25))
+        self.batch_size = int(kwargs.get("collect.batch.size", 20))
+        self.batch_events = []
+        self.batch_timeout = None
+        self.batch_condition = threading.Condition()
+        self.batch_stop = False
+        self.batch_thread = None
+
+        self.heartbeat_interval = float(kwargs.get("heartbeat.interval", 20))
+        self.heartbeat_missed = int(kwargs.get("heartbeat.missed", 3))
+        self.heartbeat_version = 0
+        self.heartbeat_snapshot = None
+        self.expire_thread = None
+
+        self.sys_monitor = SystemMonitor(
+            interval=kwargs.get("monitor.interval", 5),
+            history=kwargs.get("monitor.history", 12)
+        )
+
+        self.actions = types.MappingProxyType({})
+        self.action_limits = {}
+        self.action_hooks = []
+        self.action_stats = {}
+        self.fanout_stats = {}
+        self.fanout_pool = concurrent.futures.ThreadPoolExecutor(max_workers=int(kwargs.get("fanout.workers", 10)))
+        self.action_lock = threading.Lock()
 
         # Get Service URL and start UPNP/SSDP server is appropriate
         proto = "https" if kwargs.get("ssl.enable", False) else "http"
@@ -345,17 +382,27 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
             self.service_url = self.local_url
             self.logger.info(f"Service URL set to {self.service_url}")
         
+        self.asset_cache = StaticAssetCache(
+            variables=self.get_template_vars(),
+            max_age=kwargs.get("web.max_age", 3600),
+            watch=kwargs.get("web.watch", False)
+        )
+        self.asset_cache.load()
+
         super().__init__((host, port), KenzyRequestHandler)
 
         if kwargs.get("ssl.enable", False):
             cert_file = os.path.expanduser(kwargs.get("ssl.cert_file"))
             key_file = os.path.expanduser(kwargs.get("ssl.key_file"))
-            self.socket = ssl.wrap_socket(self.socket, certfile=cert_file, keyfile=key_file, server_side=True)
+            self.enable_ssl(cert_file, key_file)
+
+    def enable_ssl(self, cert_file, key_file):
+        self.socket = ssl.wrap_socket(self.socket, certfile=cert_file, keyfile=key_file, server_side=True)
 
     def _set_service_url(self):
         # search for UPNP service
         if self.upnp == "client" and self.service_url is None:
-            url = discover_ssdp_services(timeout=self.upnp_timeout)
+            url = discover_ssdp_services(timeout=self.upnp_timeout, http_client=self.http_client)
             if url is not None and (self.service_url is None or self.service_url != url):
                 self.service_url = url
                 self.logger.info(f"Service URL set to {self.service_url}")
@@ -363,28 +410,161 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
     @property
     def version(self):
         return __version__
+
+    def get_template_vars(self):
+        return {
+            b"{service_url}": self.service_url.encode(),
+            b"{server_uuid}": self.settings.get("id", "").encode(),
+            b"{VERSION}": ".".join([str(x) for x in VERSION]).encode(),
+            b"{APP_NAME}": __app_name__.encode(),
+            b"{APP_TITLE}": __app_title__.encode()
+        }
+
+    def process_get(self, path, headers=None):
+        """
+        Routes a GET request independent of the server engine.
+
+        Returns:
+            (tuple):  HTTP status code, content type, response body, and extra headers.
+        """
+
+        if self.local_url != self.service_url and not path.lower().startswith("/api/"):
+            return 302, None, b"", { "Location": self.service_url.rstrip("/") + path }
+
+        if path.lower() == "/" or path.lower().startswith("/admin/") or path.lower() == "/admin":
+            return 302, None, b"", { "Location": "/index.html" }
+
+        # Yeah, I know... but it works with most browsers
+        if path == "/favicon.ico":
+            path = "/favicon.svg"
+        
+        if not path.lower().startswith("/api/"):
+            asset = self.asset_cache.get(path)
+
+            if asset is None:
+                return 404, "text/plain", b"File Not Found", {}
+
+            content = asset["content"]
+            resp_headers = { "ETag": asset["etag"], "Cache-Control": asset["cache_control"] }
+
+            if asset["gzip"] is not None:
+                resp_headers["Vary"] = "Accept-Encoding"
+                if headers is not None and "gzip" in str(headers.get("Accept-Encoding", "")).lower():
+                    # Strong ETags must differ between content-codings of the same asset
+                    content = asset["gzip"]
+                    resp_headers["ETag"] = asset["etag"][:-1] + '-gz"'
+                    resp_headers["Content-Encoding"] = "gzip"
+
+            if headers is not None and resp_headers["ETag"] in [x.strip() for x in str(headers.get("If-None-Match", "")).split(",")]:
+                resp_headers.pop("Content-Encoding", None)
+                return 304, None, b"", resp_headers
+
+            return 200, asset["mime_type"], content, resp_headers
+        
+        return 200, "text/html", b"<html><head><title>Error: Unsupported Request</title></head><body>" \
+            b"<h1>Unsupported Request</h1><p>Please use POST for data transmission.</p></body></html>", {}
+
+    def process_post(self, payload, headers):
+        """
+        Authenticates and dispatches a POST request independent of the server engine.
+
+        Returns:
+            (tuple):  HTTP status code, content type, response body, and extra headers.
+        """
+
+        content_type = str(headers.get("Content-Type"))
+
+        if not self.authenticate(headers.get("Authorization")):
+            response_data = KenzyResponse("failed", None, "Unauthorized").get()
+            return 200, "application/json", json.dumps(response_data).encode("utf-8"), {}
+
+        if content_type.startswith("application/json"):
+            try:
+                data = json.loads(payload.decode("utf-8"))
+            except json.JSONDecodeError:
+                return 400, "text/plain", b"Invalid JSON payload", {}
+
+            # Process the JSON data as needed
+            if not isinstance(data, dict):
+                response_data = KenzyResponse("failed", None, "Invalid request")
+            else:
+                context = KenzyContext()
+                if isinstance(data.get("context"), dict):
+                    context = KenzyContext.from_dict(data.get("context"))
+
+                if data.get("action") is not None:
+                    response_data = self.command(data.get("action"), data.get("payload"), context)
+                    if not isinstance(response_data, KenzyResponse):
+                        logging.error(str(response_data))
+                        response_data = KenzyErrorResponse("Unrecognized response from device.")
+                else:
+                    response_data = KenzyResponse("failed", None, "Unrecognized request")
+
+            return 200, "application/json", json.dumps(response_data.get()).encode("utf-8"), {}
+
+        elif content_type.startswith("multipart/form-data"):
+            # Parse the multipart/form-data payload
+            form_data = parse_qs(payload.decode("utf-8"))
+            # Process the form data as needed
+            response_data = {"message": "Received form data", "data": form_data}
+            return 200, "application/json", json.dumps(response_data).encode("utf-8"), {}
+
+        return 415, "text/plain", b"Unsupported Media Type", {}
     
     def command(self, action=None, payload=None, context=None):
         if context is None:
             context = KenzyContext()
 
-        if str(action).strip().lower() == "register":
+        action = str(action).strip().lower()
+
+        if action == "register":
             return self.register(data=payload, context=context)
 
-        for item in self.device.accepts:
-            if str(action).strip().lower() == "shutdown":
-                t = threading.Thread(target=self.shutdown)
-                t.daemon = True
-                t.start()
-                self.timers["shutdown"] = t
+        if action == "shutdown":
+            t = threading.Thread(target=self.shutdown)
+            t.daemon = True
+            t.start()
+            self.timers["shutdown"] = t
+
+            return KenzySuccessResponse("Shutdown commencing.")
 
-                return KenzySuccessResponse("Shutdown commencing.")
+        func = self.actions.get(action)
+        if func is None:
+            return KenzyErrorResponse("Unrecognized command.")
 
-            if str(item).strip().lower() == str(action).strip().lower():
-                ret = eval("self.device." + str(item).strip().lower() + "(data=payload, context=context)")
-                return ret
+        limit = self.action_limits.get(action)
+        if limit is not None:
+            with limit:
+                return self._dispatch(action, func, payload, context)
 
-        return KenzyErrorResponse("Unrecognized command.")
+        return self._dispatch(action, func, payload, context)
+
+    def _dispatch(self, action, func, payload, context):
+        start = time.perf_counter()
+        ret = func(data=payload, context=context)
+        elapsed = time.perf_counter() - start
+
+        with self.action_lock:
+            stats = self.action_stats.setdefault(action, { "count": 0, "total": 0.0, "max": 0.0 })
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+
+        for hook in self.action_hooks:
+            try:
+                hook(action, elapsed, ret)
+            except Exception:
+                self.logger.debug(str(sys.exc_info()[0]))
+                self.logger.debug(str(traceback.format_exc()))
+
+        return ret
+
+    def add_action_hook(self, func):
+        """
+        Registers a callable invoked after every device action as func(action, elapsed_seconds, response).
+        """
+
+        self.action_hooks.append(func)
 
     def authenticate(self, api_key):
         if str(api_key).lower().startswith("bearer "):
@@ -417,6 +597,10 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
 
         if service_url != local_url:
             # Send to service_url
+            if self.batch_enabled and not wait:
+                self._queue_collect(data, context, timeout=timeout)
+                return True
+
             req = {
                 "action": "collect",
                 "payload": data,
@@ -432,17 +616,65 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
 
         return True
 
+    def _queue_collect(self, data, context, timeout=None):
+        with self.batch_condition:
+            self.batch_events.append({ "data": data, "context": context.get() })
+            if timeout is not None:
+                self.batch_timeout = timeout
+
+            if self.batch_thread is None or not self.batch_thread.is_alive():
+                self.batch_stop = False
+                self.batch_thread = threading.Thread(target=self._process_collect_batches, daemon=True)
+                self.batch_thread.start()
+
+            self.batch_condition.notify()
+
+    def _process_collect_batches(self):
+        # Single sender thread so events arrive at the hub in the order they were collected
+        while True:
+            with self.batch_condition:
+                while len(self.batch_events) == 0 and not self.batch_stop:
+                    self.batch_condition.wait()
+
+                if len(self.batch_events) == 0 and self.batch_stop:
+                    break
+
+                deadline = time.time() + self.batch_window
+                while len(self.batch_events) < self.batch_size and not self.batch_stop:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.batch_condition.wait(remaining)
+
+                events = self.batch_events[:self.batch_size]
+                self.batch_events = self.batch_events[self.batch_size:]
+                timeout = self.batch_timeout
+
+            req = {
+                "action": "collect_batch",
+                "payload": { "events": events },
+                "context": self.get_local_context().get()
+            }
+
+            self.send_request(req, wait=True, timeout=timeout)
+
     def _register(self, **kwargs):
-        cnt = 0
         self.register_event.clear()
 
-        while not self.register_event.is_set():
-            if cnt > 40:
-                self.register()
-                cnt = 0
+        while not self.register_event.wait(self.heartbeat_interval):
+            self.register()
+
+    def _expire_devices(self):
+        self.register_event.clear()
 
-            cnt += 1
-            time.sleep(0.5)
+        while not self.register_event.wait(max(1.0, self.heartbeat_interval / 2)):
+            now = time.time()
+            for url in list(self.remote_devices.keys()):
+                hb = self.remote_devices.get(url, {}).get("heartbeat", {})
+                interval = float(hb.get("interval", self.heartbeat_interval))
+                if now - hb.get("last_seen", now) > interval * self.heartbeat_missed:
+                    self.remote_devices.pop(url, None)
+                    self.logger.info(f"Expired remote device {url} after {self.heartbeat_missed} missed heartbeats")
 
     def register(self, **kwargs):
         local_url = self.local_url
@@ -452,42 +684,95 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
             data = kwargs.get("data", {})
             url = data.get("url")
             if url is not None:
-                if url not in self.remote_devices:
-                    self.logger.info(f"Registered remote device {url}")
-                else:
-                    self.logger.debug(f"Registered remote device {url}")
+                # Devices without heartbeat info always send the full status
+                hb = data.pop("heartbeat", None)
+                if not isinstance(hb, dict):
+                    hb = { "mode": "full" }
+
+                mode = hb.get("mode", "full")
+                if mode == "full":
+                    if url not in self.remote_devices:
+                        self.logger.info(f"Registered remote device {url}")
+                    else:
+                        self.logger.debug(f"Registered remote device {url}")
+
+                    my_type = data.get("type", "unknown")
+                    cnt = 1 + self.remote_devices.count(type=my_type)
 
-                cnt = 1
-                my_type = data.get("type", "unknown")
-                for item in self.remote_devices:
-                    if self.remote_devices.get(item).get("type", "unknown") == my_type:
-                        cnt += 1
+                    if url not in self.remote_devices:
+                        data["name"] = data.get("name", my_type + str(cnt))
+                    else:
+                        data["name"] = self.remote_devices.get(url).get("name")
+
+                    self.logger.debug(f"Name: {data.get('name')}")
+                    entry = data
 
-                if url not in self.remote_devices:
-                    data["name"] = data.get("name", my_type + str(cnt))
                 else:
-                    data["name"] = self.remote_devices.get(url).get("name")
-                    
-                self.logger.debug(f"Name: {data.get('name')}")
-                self.remote_devices[url] = data
+                    entry = self.remote_devices.get(url)
+                    if entry is None or entry.get("heartbeat", {}).get("version") != hb.get("base"):
+                        self.logger.debug(f"Heartbeat out of sync for {url}")
+                        return KenzyErrorResponse("Resync required", data={ "resync": True })
+
+                    # Copy so a concurrent status request never serializes a half-applied entry
+                    entry = copy.deepcopy(entry)
+                    if mode == "delta":
+                        apply_delta(entry, data.get("changes"), data.get("removed"))
+
+                entry["heartbeat"] = {
+                    "version": hb.get("version"),
+                    "interval": hb.get("interval", self.heartbeat_interval),
+                    "last_seen": time.time()
+                }
+                self.remote_devices[url] = entry
 
             self._is_registered = True
             return KenzySuccessResponse("Register completed successfully.")
         else:
             if self.device is not None:
+                st = {}
+                if "status" in self.device.accepts:
+                    # Normalize through JSON so snapshots compare the same as what the hub stores
+                    st = json.loads(json.dumps(self.device.status().get().get("data", {})))
+
+                    # The metric history changes on every sample so it is only served by the status endpoint
+                    if isinstance(st.get("info"), dict):
+                        st["info"].pop("history", None)
+
+                version = self.heartbeat_version + 1
                 cmd = RegisterCommand()
                 cmd.set("url", self.local_url)
 
-                if "status" in self.device.accepts:
-                    st = self.device.status().get().get("data", {})
+                if self.heartbeat_snapshot is None:
+                    mode = "full"
                     for item in st:
                         cmd.set(item, st.get(item))
+                else:
+                    changes, removed = get_delta(self.heartbeat_snapshot, st)
+                    mode = "delta" if len(changes) > 0 or len(removed) > 0 else "ping"
+                    if mode == "delta":
+                        cmd.set("changes", changes)
+                        cmd.set("removed", removed)
+
+                cmd.set("heartbeat", { 
+                    "mode": mode, 
+                    "version": version, 
+                    "base": self.heartbeat_version, 
+                    "interval": self.heartbeat_interval 
+                })
+                cmd.set_context(self.get_local_context())
 
                 # Send to service_url
-                if self.send_request(cmd):
-                    self._is_registered = True
-                else:
+                response = self._send_request(cmd.get(), full_response=True)
+                if response is None:
                     self._set_service_url()
+                elif response.is_success():
+                    self._is_registered = True
+                    self.heartbeat_version = version
+                    self.heartbeat_snapshot = st
+                elif isinstance(response.data, dict) and response.data.get("resync"):
+                    self.heartbeat_snapshot = None
+                    self.heartbeat_version = 0
+                    self.register()
 
     def send_request(self, payload, headers=None, url=None, wait=True, timeout=None):
 
@@ -495,104 +780,145 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
             if wait:
                 return self._send_request(payload=payload, headers=headers, url=url, timeout=timeout)
             else:
-                self.thread_pool.submit(self._send_request, payload=payload, headers=headers, url=url, timeout=timeout)
+                self._submit_request(payload=payload, headers=headers, url=url, timeout=timeout)
                 return True
 
         if isinstance(payload, GenericCommand):
-            if payload.get_url() is None:
-                ctx = payload.get_context()
-                if isinstance(ctx, KenzyContext) and ctx.location is not None:
-
-                    ret = False
-                    for device_url in self.remote_devices:
-                        device = self.remote_devices.get(device_url)
-                        if device.get("active", False) and device.get("location") == ctx.location:
-                            if payload.action in device.get("accepts", []):
-                                payload.set_url(device_url)
-                                ret = self._send_command(copy.copy(payload))
-                    
-                    return ret
-                
             if timeout is not None:
                 payload.timeout = timeout
 
-            return self._send_command(payload, wait=wait)
+            if not wait:
+                # Run the phases in the background so mute/speak/unmute still arrive in order
+                self.thread_pool.submit(self._send_command, payload)
+                return True
+
+            return self._send_command(payload)
+
+    def _get_targets(self, cmd):
+        if cmd.get_url() is not None:
+            return [cmd.get_url()]
+
+        ctx = cmd.get_context()
+        if isinstance(ctx, KenzyContext) and ctx.location is not None:
+            return self.remote_devices.find(location=ctx.location, action=cmd.action, active=True)
+
+        # No URL or location means the command goes to the service_url
+        return [None]
 
-    def _send_command(self, payload, wait=True):
-        ret = True
+    def _fan_out(self, requests, timeout=None):
+        futures = [self.fanout_pool.submit(self._send_request, payload=x_payload, url=url, timeout=timeout) for x_payload, url in requests]
+        return [x.result() for x in futures]
+
+    def _send_command(self, payload):
+        """
+        Sends the pre, primary, and post commands in phases.  Every target of a phase is sent to concurrently
+        and the next phase starts only when the previous one has completed.
+        """
 
         payload.set_context(self.get_local_context())
-        
-        # use payload context to get group/location
-
-        pre_cmds = payload.pre()
-        post_cmds = payload.post()
-
-        # Send PRE
-        for cmd in pre_cmds:
-            cmd.set_context(payload.get_context())
-            url = cmd.get_url()
-            x_payload = cmd.get()
-            if not self.send_request(payload=cmd, url=url, wait=wait, timeout=payload.timeout):
-                ret = False
-
-        # Send Primary
-        url = payload.get_url()
-        x_payload = payload.get()
-        if not self.send_request(payload=x_payload, url=url, wait=wait, timeout=payload.timeout):
-            ret = False
-
-        # Send POST
-        for cmd in post_cmds:
-            cmd.set_context(payload.get_context())
-            url = cmd.get_url()
-            x_payload = cmd.get()
-            if not self.send_request(payload=cmd, url=url, wait=wait, timeout=payload.timeout):
-                ret = False
-    
-        return ret
 
-    def _send_request(self, payload, headers=None, url=None, timeout=None):
+        primary_targets = self._get_targets(payload)
+        if len(primary_targets) == 0:
+            return False
+
+        phases = [
+            ("pre", payload.pre()),
+            ("primary", None),
+            ("post", payload.post())
+        ]
+
+        result = { "sent": 0, "failed": 0, "phases": {} }
+
+        for phase, cmds in phases:
+            requests = []
+            if cmds is None:
+                requests = [(payload.get(), url) for url in primary_targets]
+            else:
+                for cmd in cmds:
+                    cmd.set_context(payload.get_context())
+                    requests.extend([(cmd.get(), url) for url in self._get_targets(cmd)])
+
+            start = time.perf_counter()
+            responses = self._fan_out(requests, timeout=payload.timeout)
+            elapsed = time.perf_counter() - start
+
+            result["phases"][phase] = { "targets": len(requests), "elapsed": round(elapsed, 6) }
+            result["sent"] += len(responses)
+            result["failed"] += len([x for x in responses if not x])
+
+        self.logger.debug(f"Fan-out for {payload.action}: {result}")
+
+        with self.action_lock:
+            for phase in result["phases"]:
+                stats = self.fanout_stats.setdefault(phase, { "count": 0, "total": 0.0, "max": 0.0 })
+                stats["count"] += 1
+                stats["total"] += result["phases"][phase]["elapsed"]
+                stats["max"] = max(stats["max"], result["phases"][phase]["elapsed"])
+
+            self.fanout_stats["last"] = result
+
+        return result["failed"] == 0
+
+    def _submit_request(self, payload, headers=None, url=None, timeout=None):
+        self.thread_pool.submit(self._send_request, payload=payload, headers=headers, url=url, timeout=timeout)
+
+    def _prepare_request(self, payload, headers=None, url=None):
         token = uuid.uuid4()
 
-        if isinstance(payload, dict):
-            payload["context"] = payload.get("context", self.get_local_context().get())
-        else:
-            return False
-            
-        try:
-            if headers is None or not isinstance(headers, dict):
-                headers = {}
+        payload["context"] = payload.get("context", self.get_local_context().get())
+
+        if headers is None or not isinstance(headers, dict):
+            headers = {}
+
+        headers["Authorization"] = f"Bearer {token}"
+        headers["Content-Type"] = "application/json"
 
-            headers["Authorization"] = f"Bearer {token}"
-            headers["Content-Type"] = "application/json"
+        if url is None:
+            url = self.service_url
 
-            if url is None:
-                url = self.service_url
+        return payload, headers, url
 
-            kwargs = { "verify": False }
+    def _send_request(self, payload, headers=None, url=None, timeout=None, full_response=False):
+        if not isinstance(payload, dict):
+            return None if full_response else False
+            
+        try:
+            payload, headers, url = self._prepare_request(payload, headers=headers, url=url)
+
+            kwargs = {}
             if timeout is not None:
                 kwargs["timeout"] = timeout
 
-            # s = requests.Session()
-            # s.mount(url.split(":", 1)[0] + "://", HTTPAdapter(max_retries=1, pool_block=False))
-            response = requests.post(url, json=payload, headers=headers, **kwargs)
-            response_data = response.json()
+            if self.local_transport is not None and self.local_transport.has(url):
+                # Co-located device under the same supervisor; skip the HTTP stack entirely
+                response_data = self.local_transport.send(url, payload, timeout=timeout, headers=headers)
+                if response_data is None:
+                    raise TimeoutError("Local transport timed out")
+            else:
+                response = self.http_client.post(url, json=payload, headers=headers, **kwargs)
+                response_data = response.json()
+
             self.logger.debug(f"Response: {response_data}")
 
         except (requests.exceptions.ConnectTimeout, requests.exceptions.ReadTimeout, TimeoutError, urllib3.exceptions.ReadTimeoutError):
             self.logger.error("Request timed out")
             self.logger.debug(f"Timeout error: url={url} action={payload.get('action')}")
-            return False
+            return None if full_response else False
         except (requests.exceptions.ConnectionError, ConnectionRefusedError, urllib3.exceptions.NewConnectionError, urllib3.exceptions.MaxRetryError):
             self.logger.error("Request connection error")
             self.logger.debug(f"Connection error: url={url} action={payload.get('action')}")
-            return False
-        except requests.exceptions.RequestException:
+            return None if full_response else False
+        except (requests.exceptions.RequestException, ValueError):
             self.logger.debug(str(sys.exc_info()[0]))
             self.logger.debug(str(traceback.format_exc()))
             self.logger.error("An error occurred")
-            return False
+            return None if full_response else False
+
+        if full_response:
+            if not isinstance(response_data, dict):
+                return KenzyErrorResponse("Unrecognized response")
+
+            return KenzyResponse(status=response_data.get("status"), data=response_data.get("data"), errors=response_data.get("errors"))
 
         return True
     
@@ -615,7 +941,7 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
         except KeyboardInterrupt:
             pass
 
-    def serve_forever(self, poll_interval: float = 0.5, *args, **kwargs):
+    def _start_services(self):
         self.active = True
 
         if not self.device.is_alive():
@@ -624,6 +950,8 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
         if self.ssdp_server is not None:
             self.ssdp_server.start()
 
+        self.sys_monitor.start()
+
         self.restart_thread = threading.Thread(target=self._restart_watcher, daemon=True)
         self.restart_thread.start()
 
@@ -631,15 +959,83 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
             self.register_event.clear()
             self.register_thread = threading.Thread(target=self._register, daemon=True)
             self.register_thread.start()
+        else:
+            self.expire_thread = threading.Thread(target=self._expire_devices, daemon=True)
+            self.expire_thread.start()
 
         self.logger.info("Server started on " + str("%s:%s" % self.server_address) + " (" + str(self.server_name) + ")")
+
+    def serve_forever(self, poll_interval: float = 0.5, *args, **kwargs):
+        self._start_services()
         super().serve_forever(poll_interval)
 
+    def _stop_serving(self):
+        super().shutdown()
+
+    def set_local_transport(self, transport):
+        """
+        Attaches an in-host transport (see kenzy.supervisor.LocalTransport) used for co-located devices.
+
+        Args:
+            transport (LocalTransport): Transport instance for this process.
+        """
+
+        self.local_transport = transport
+        if transport is not None:
+            transport.start(self)
+
     def set_device(self, device):
         self.device = device
 
+        # Resolve accepted actions to bound methods once instead of on every request
+        actions = {}
+        for item in device.accepts:
+            name = str(item).strip().lower()
+            func = getattr(device, name, None)
+            if callable(func):
+                actions[name] = func
+            else:
+                self.logger.warning(f"Device does not implement accepted action: {name}")
+
+        self.actions = types.MappingProxyType(actions)
+
+        limits = self.settings.get("actions.limits", {})
+        self.action_limits = {}
+        if isinstance(limits, dict):
+            for name in limits:
+                if str(name).strip().lower() in actions and int(limits[name]) > 0:
+                    self.action_limits[str(name).strip().lower()] = threading.BoundedSemaphore(int(limits[name]))
+
+    def get_metrics(self):
+        with self.action_lock:
+            actions = {}
+            for name, stats in self.action_stats.items():
+                actions[name] = {
+                    "count": stats["count"],
+                    "avg": round(stats["total"] / stats["count"], 6) if stats["count"] > 0 else 0.0,
+                    "max": round(stats["max"], 6)
+                }
+
+            fanout = {}
+            for phase, stats in self.fanout_stats.items():
+                if phase == "last":
+                    fanout[phase] = stats
+                    continue
+
+                fanout[phase] = {
+                    "count": stats["count"],
+                    "avg": round(stats["total"] / stats["count"], 6) if stats["count"] > 0 else 0.0,
+                    "max": round(stats["max"], 6)
+                }
+
+        return {
+            "client": self.http_client.get_metrics(),
+            "actions": actions,
+            "fanout": fanout
+        }
+
     def shutdown(self, **kwargs):
-        for item in self.remote_devices:
+        for item in list(self.remote_devices.keys()):
             cmd = GenericCommand("shutdown", context=self.get_local_context(), url=item)
             self.send_request(cmd, url=item)
 
@@ -651,14 +1047,28 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
             self.ssdp_server.stop()
             self.ssdp_server = None
 
-        if self.register_thread is not None and self.register_thread.is_alive():
+        if (self.register_thread is not None and self.register_thread.is_alive()) \
+                or (self.expire_thread is not None and self.expire_thread.is_alive()):
             self.register_event.set()
 
+        self.sys_monitor.stop()
+
+        if self.batch_thread is not None and self.batch_thread.is_alive():
+            with self.batch_condition:
+                self.batch_stop = True
+                self.batch_condition.notify()
+
+            self.batch_thread.join(self.batch_window + 5)
+
         if self.device.is_alive():
             self.device.stop()
 
         self.logger.info("Server attempting shutdown on " + str("%s:%s" % self.server_address) + " (" + str(self.server_name) + ")")
         self.socket.close()
+        self.http_client.close()
+
+        if self.local_transport is not None:
+            self.local_transport.stop()
         
         if self.active:
             self.active = False
@@ -666,7 +1076,7 @@ class KenzyHTTPServer(ThreadingMixIn, HTTPServer):
             self.timers["shutdown"].start()
             return
         
-        super().shutdown()
+        self._stop_serving()
         self.logger.info("Server stopped on " + str("%s:%s" % self.server_address) + " (" + str(self.server_name) + ")")
 
     def status(self, **kwargs):
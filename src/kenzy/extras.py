@@ -10,7 +10,12 @@ import json
 import tempfile
 import zipfile
 import collections
+import gzip
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlsplit
 import xml.etree.ElementTree as ET
 from . import __app_title__, __version__
 import psutil
@@ -83,6 +88,107 @@ class GenericCommand:
         return self.context
         
 
+class KenzyHTTPClient:
+    """
+    Pooled HTTP client that keeps one keep-alive session per destination (scheme://host:port).
+
+    Args:
+        pool_size (int): Maximum number of connections kept open per destination.
+        retries (int): Number of retries on connection failures (requests are not replayed on read errors).
+        backoff (float): Backoff factor (in seconds) applied between retries.
+        verify (bool): Verify SSL certificates.
+    """
+
+    def __init__(self, pool_size=10, retries=1, backoff=0.2, verify=False):
+        self.pool_size = int(pool_size)
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        self.verify = verify
+        self.sessions = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_destination(url):
+        parts = urlsplit(str(url))
+        return "%s://%s" % (parts.scheme, parts.netloc)
+
+    def get_session(self, url):
+        dest = self.get_destination(url)
+
+        with self.lock:
+            session = self.sessions.get(dest)
+            if session is None:
+                # Only connection failures are retried so that POST bodies are never replayed
+                retry = Retry(total=self.retries, connect=self.retries, read=0, status=0, redirect=0, backoff_factor=self.backoff)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry, pool_block=False)
+
+                session = requests.Session()
+                session.verify = self.verify
+                session.mount(dest.split(":", 1)[0] + "://", adapter)
+
+                self.sessions[dest] = session
+                self.counters[dest] = { "requests": 0, "errors": 0 }
+
+            self.counters[dest]["requests"] += 1
+
+        return session
+
+    def request(self, method, url, **kwargs):
+        session = self.get_session(url)
+        try:
+            return session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self.lock:
+                self.counters[self.get_destination(url)]["errors"] += 1
+            raise
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def get_metrics(self):
+        ret = { "requests": 0, "connections": 0, "errors": 0, "reuse_rate": 0.0, "destinations": {} }
+
+        with self.lock:
+            items = list(self.sessions.items())
+
+        for dest, session in items:
+            connections = 0
+            for adapter in session.adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+
+            requests_sent = self.counters[dest]["requests"]
+            ret["destinations"][dest] = {
+                "requests": requests_sent,
+                "connections": connections,
+                "errors": self.counters[dest]["errors"],
+                "reuse_rate": round(1.0 - (float(connections) / requests_sent), 4) if requests_sent > 0 else 0.0
+            }
+
+            ret["requests"] += requests_sent
+            ret["connections"] += connections
+            ret["errors"] += self.counters[dest]["errors"]
+
+        if ret["requests"] > 0:
+            ret["reuse_rate"] = round(1.0 - (float(ret["connections"]) / ret["requests"]), 4)
+
+        return ret
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+
+            self.sessions = {}
+
+
 def dayPart():
     """
     Returns the part of the day based on the system time based on generally acceptable breakpoints.
@@ -179,7 +285,7 @@ def clean_string(input_string):
     return re.sub(pattern, "", input_string)
 
 
-def get_file(requested_file):
+def get_file_path(requested_file):
     file_path = requested_file
     file_path = file_path if "?" not in file_path else file_path[0:file_path.find("?")]
     file_path = file_path if "#" not in file_path else file_path[0:file_path.find("#")]
@@ -189,6 +295,12 @@ def get_file(requested_file):
     if file_path == "" or file_path.endswith("/"):
         file_path += "index.html"
 
+    return file_path
+
+
+def get_file(requested_file):
+    file_path = get_file_path(requested_file)
+
     if not os.path.exists(os.path.join(os.path.dirname(__file__), "web", file_path)):
         return None, None
         
@@ -197,6 +309,83 @@ def get_file(requested_file):
         return mime_type, fp.read()
 
 
+class StaticAssetCache:
+    """
+    In-memory cache of the web admin assets.  Bodies are templated and gzipped once at load time.
+
+    Args:
+        variables (dict): Template placeholders (bytes) and their replacement values (bytes) for HTML/UPnP files.
+        max_age (int): Cache-Control max-age (seconds) for static assets.  Templated files are always revalidated.
+        watch (bool): Reload a file when its modification time changes on disk.
+    """
+
+    TEMPLATED = (".html", "upnp.xml")
+    COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+
+    def __init__(self, variables=None, max_age=3600, watch=False, base_folder=None):
+        self.variables = variables if isinstance(variables, dict) else {}
+        self.max_age = int(max_age)
+        self.watch = watch
+        self.base_folder = base_folder if base_folder is not None else os.path.join(os.path.dirname(__file__), "web")
+        self.assets = {}
+        self.lock = threading.Lock()
+
+    def load(self):
+        for file_name in os.listdir(self.base_folder):
+            if file_name.startswith("__") or file_name.endswith(".py") or not os.path.isfile(os.path.join(self.base_folder, file_name)):
+                continue
+
+            self._load_file(file_name.lower())
+
+    def _load_file(self, file_path):
+        full_path = os.path.join(self.base_folder, file_path)
+        if not os.path.isfile(full_path):
+            with self.lock:
+                self.assets.pop(file_path, None)
+            return None
+
+        mtime = os.path.getmtime(full_path)
+        mime_type, _ = mimetypes.guess_type(file_path)
+        with open(full_path, "rb") as fp:
+            content = fp.read()
+
+        if file_path.endswith(self.TEMPLATED):
+            for key in self.variables:
+                content = content.replace(key, self.variables[key])
+            cache_control = "no-cache"
+        else:
+            cache_control = f"public, max-age={self.max_age}"
+
+        compressed = None
+        if mime_type is not None and mime_type.startswith(self.COMPRESSIBLE) and len(content) > 512:
+            compressed = gzip.compress(content, 9)
+
+        asset = {
+            "mime_type": mime_type,
+            "content": content,
+            "gzip": compressed,
+            "etag": '"%s"' % hashlib.sha1(content).hexdigest(),
+            "cache_control": cache_control,
+            "mtime": mtime
+        }
+
+        with self.lock:
+            self.assets[file_path] = asset
+
+        return asset
+
+    def get(self, requested_file):
+        file_path = get_file_path(requested_file)
+
+        asset = self.assets.get(file_path)
+        if self.watch:
+            full_path = os.path.join(self.base_folder, file_path)
+            if asset is None or not os.path.isfile(full_path) or os.path.getmtime(full_path) != asset["mtime"]:
+                asset = self._load_file(file_path)
+
+        return asset
+
+
 def get_local_ip_address():
     try:
         # Create a temporary socket to retrieve the local IP address
@@ -359,7 +548,7 @@ def parse_presentation_url(xml_data):
     return presentation_url
 
 
-def discover_ssdp_services(search_text=SSDP_DEVICE_TYPE, timeout=45):
+def discover_ssdp_services(search_text=SSDP_DEVICE_TYPE, timeout=45, http_client=None):
     logger = logging.getLogger("SSDP-CLT")
     ssdp_ip = "239.255.255.250"
     ssdp_port = 1900
@@ -387,7 +576,10 @@ def discover_ssdp_services(search_text=SSDP_DEVICE_TYPE, timeout=45):
             if b"X-KENZY-SERVICE" in response:
                 headers = get_ssdp_headers(response)
                 loc = headers["LOCATION"]
-                response = requests.get(loc)
+                if http_client is not None:
+                    response = http_client.get(loc, timeout=timeout)
+                else:
+                    response = requests.get(loc, timeout=timeout)
                 if response.status_code == 200:
                     p = parse_presentation_url(response.text)
                     if p is not None:
@@ -455,13 +647,14 @@ def _join(*args):
     return ' '.join(filter(bool, args))
 
 
-def get_sys_info():
+def read_sys_info(cpu_interval=None, cpu_percent=True):
     sys_info = { "cpu": {}, "memory": { "virtual": {}, "swap": {} }, "disk": { "partitions": []}, "network": {} }
 
-    sys_info["cpu"]["percent"] = psutil.cpu_percent(interval=1)
+    cpu_freq = psutil.cpu_freq()
+    sys_info["cpu"]["percent"] = psutil.cpu_percent(interval=cpu_interval) if cpu_percent else None
     sys_info["cpu"]["count"] = psutil.cpu_count()
     sys_info["cpu"]["count_physical"] = psutil.cpu_count(logical=False)
-    sys_info["cpu"]["frequency"] = psutil.cpu_freq().max
+    sys_info["cpu"]["frequency"] = cpu_freq.max if cpu_freq is not None else None
     sys_info["cpu"]["load"] = psutil.getloadavg()
 
     vm = psutil.virtual_memory()
@@ -523,6 +716,160 @@ def get_sys_info():
     return sys_info
 
 
+class SystemMonitor:
+    """
+    Background sampler that keeps the latest system metrics and a rolling history so status calls never block.
+
+    Args:
+        interval (float): Seconds between samples.
+        history (int): Number of samples retained for trends.
+    """
+
+    def __init__(self, interval=5, history=12):
+        self.interval = float(interval)
+        self.samples = collections.deque(maxlen=int(history))
+        self.snapshot = None
+        self.previous = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        # Prime the CPU counter so the first non-blocking reading is meaningful
+        psutil.cpu_percent(interval=None)
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join()
+
+    def _run(self):
+        self.stop_event.wait(min(self.interval, 1.0))
+
+        while not self.stop_event.is_set():
+            try:
+                self.sample()
+            except Exception:
+                logging.getLogger("SYS-MON").debug("Unable to sample system metrics")
+
+            self.stop_event.wait(self.interval)
+
+    def sample(self):
+        now = time.time()
+        info = read_sys_info(cpu_interval=None)
+
+        entry = {
+            "timestamp": now,
+            "cpu": info["cpu"]["percent"],
+            "memory": info["memory"]["virtual"]["percent"],
+            "disk_read": 0,
+            "disk_write": 0,
+            "net_recv": 0,
+            "net_sent": 0
+        }
+
+        totals = {
+            "disk_read": info["disk"]["io"]["read_bytes"],
+            "disk_write": info["disk"]["io"]["write_bytes"],
+            "net_recv": sum([x["bytes_recv"] for x in info["network"].values()]),
+            "net_sent": sum([x["bytes_sent"] for x in info["network"].values()])
+        }
+
+        # Counters are converted to per-second rates between samples
+        if self.previous is not None and now > self.previous[0]:
+            elapsed = now - self.previous[0]
+            for key in totals:
+                entry[key] = max(0, int((totals[key] - self.previous[1][key]) / elapsed))
+
+        self.previous = (now, totals)
+
+        with self.lock:
+            self.samples.append(entry)
+            self.snapshot = info
+
+    def get(self):
+        with self.lock:
+            if self.snapshot is None:
+                return None
+
+            ret = dict(self.snapshot)
+            ret["history"] = list(self.samples)
+
+        return ret
+
+
+def get_sys_info(monitor=None):
+    if monitor is not None:
+        info = monitor.get()
+        if info is not None:
+            return info
+
+        # Until the first sample a non-blocking reading would be 0% (and would reset the monitor's CPU baseline)
+        return read_sys_info(cpu_interval=None, cpu_percent=False)
+
+    return read_sys_info(cpu_interval=None)
+
+
+def get_delta(old, new):
+    """
+    Compares two JSON-style dictionaries and returns the nested changes and the key paths removed.
+
+    Returns:
+        (tuple):  Dictionary of added/changed values (nested for sub-dictionaries) and list of removed key paths.
+    """
+
+    changes = {}
+    removed = []
+
+    for key in new:
+        if key not in old:
+            changes[key] = new[key]
+        elif isinstance(new[key], dict) and isinstance(old[key], dict):
+            sub_changes, sub_removed = get_delta(old[key], new[key])
+            if len(sub_changes) > 0:
+                changes[key] = sub_changes
+            removed.extend([[key] + x for x in sub_removed])
+        elif new[key] != old[key]:
+            changes[key] = new[key]
+
+    for key in old:
+        if key not in new:
+            removed.append([key])
+
+    return changes, removed
+
+
+def apply_delta(target, changes=None, removed=None):
+    """
+    Applies the output of get_delta() to target in place.
+    """
+
+    if isinstance(changes, dict):
+        for key in changes:
+            if isinstance(changes[key], dict) and isinstance(target.get(key), dict):
+                apply_delta(target[key], changes[key])
+            else:
+                target[key] = changes[key]
+
+    if isinstance(removed, list):
+        for path in removed:
+            item = target
+            for key in path[:-1]:
+                item = item.get(key) if isinstance(item, dict) else None
+
+            if isinstance(item, dict):
+                item.pop(path[-1], None)
+
+    return target
+
+
 def get_status(obj):
     d = {
         "active": obj.is_alive(),
@@ -531,7 +878,8 @@ def get_status(obj):
         "location": obj.location,
         "group": obj.group,
         "version": obj.service.version,
-        "info": get_sys_info(),
+        "info": get_sys_info(monitor=obj.service.sys_monitor),
+        "metrics": obj.service.get_metrics(),
         "settings": obj.settings,
         "data": {}
     }
@@ -66,9 +66,11 @@ video_device = cv2.VideoCapture(get_raw_value(ARGS.video_device))
 last_image = None
 
 if cfg.get("object.detection"):
+    option_prefix = "object." + str(cfg.get("object.model_type", "ssd")) + "."
     model = object_model(model_type=cfg.get("object.model_type", "ssd"), 
                          model_config=cfg.get("object.model_config"), 
-                         model_file=cfg.get("object.model_file"))
+                         model_file=cfg.get("object.model_file"),
+                         options={ k[len(option_prefix):]: v for k, v in cfg.items() if k.startswith(option_prefix) })
 
     labels = object_labels(label_file=cfg.get("object.label_file", None), model_type=cfg.get("object.model_type", None))
 
@@ -0,0 +1,438 @@
+import importlib
+import json
+import logging
+import os
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime
+except ModuleNotFoundError:
+    onnxruntime = None
+
+
+RESOURCES = os.path.join(os.path.dirname(__file__), "resources")
+
+BACKENDS = {}
+
+
+def register_backend(name):
+    """
+    Class decorator that makes a detector backend available as object.model_type.
+
+    Args:
+        name (str): Model type used to select the backend.
+    """
+
+    def wrapper(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+
+    return wrapper
+
+
+def get_backend(model_type="ssd", model_config=None, model_file=None, batch_size=1, options=None, warmup=True):
+    """
+    Creates and loads the detector backend registered for the model type.
+
+    Args:
+        model_type (str): Registered backend name (e.g. ssd, yolo, onnx).
+        model_config (str): Backend configuration file.
+        model_file (str): Model weights file.
+        batch_size (int): Frames expected per forward pass.
+        options (dict): Backend specific options (object.<model_type>.* settings).
+        warmup (bool): Run one blank forward pass so the first frame isn't slowed by lazy initialization.
+
+    Returns:
+        (DetectorBackend):  Loaded backend.
+    """
+
+    if model_type not in BACKENDS:
+        raise ValueError(f"Unknown object model type: {model_type} (available: {', '.join(BACKENDS.keys())})")
+
+    backend = BACKENDS[model_type](model_config=model_config, model_file=model_file, batch_size=batch_size, options=options)
+    backend.load()
+
+    if warmup:
+        backend.warmup()
+
+    return backend
+
+
+# Detections are kept as compact structured arrays until they are reported
+DETECTION_DTYPE = np.dtype([
+    ("class_id", np.int32),
+    ("confidence", np.float32),
+    ("left", np.int32),
+    ("top", np.int32),
+    ("right", np.int32),
+    ("bottom", np.int32)
+])
+
+
+def make_detections(class_ids=(), confidences=(), left=(), top=(), right=(), bottom=()):
+    """
+    Builds a detection array from column arrays.
+
+    Returns:
+        (numpy.ndarray):  Structured array of DETECTION_DTYPE.
+    """
+
+    ret = np.empty(len(class_ids), dtype=DETECTION_DTYPE)
+    ret["class_id"] = class_ids
+    ret["confidence"] = confidences
+    ret["left"] = left
+    ret["top"] = top
+    ret["right"] = right
+    ret["bottom"] = bottom
+
+    return ret
+
+
+def class_filter(labels, classes=None):
+    """
+    Converts an allow-list of class names to class ids.
+
+    Args:
+        labels (list): Class labels.
+        classes (list): Class names to keep (None keeps all classes).
+
+    Returns:
+        (numpy.ndarray):  Allowed class ids or None for all classes.
+    """
+
+    if classes is None:
+        return None
+
+    classes = set([classes] if isinstance(classes, str) else classes)
+    return np.array([idx for idx, name in enumerate(labels if labels is not None else []) if name in classes], dtype=np.int32)
+
+
+def detection_names(detections, labels):
+    """
+    Looks up the label of every detection (None for ids without a label).
+    """
+
+    names = np.array(list(labels if labels is not None else []) + [None], dtype=object)
+    ids = detections["class_id"]
+    return names[np.where((ids >= 0) & (ids < len(names) - 1), ids, len(names) - 1)]
+
+
+def detections_to_objects(detections, labels=None, timestamp=None):
+    """
+    Converts a detection array to the object dictionaries reported by the device.
+    """
+
+    ret = []
+    if detections is None:
+        return ret
+
+    for row, name in zip(detections.tolist(), detection_names(detections, labels)):
+        item = {
+            "type": "object",
+            "confidence": row[1],
+            "name": name,
+            "location": { "left": row[2], "top": row[3], "right": row[4], "bottom": row[5] }
+        }
+
+        if timestamp is not None:
+            item["timestamp"] = timestamp
+
+        ret.append(item)
+
+    return ret
+
+
+def offset_detections(detections, left=0, top=0):
+    """
+    Shifts detections found in a cropped region back into full-frame coordinates.
+    """
+
+    if left == 0 and top == 0:
+        return detections
+
+    ret = detections.copy()
+    ret["left"] += int(left)
+    ret["right"] += int(left)
+    ret["top"] += int(top)
+    ret["bottom"] += int(top)
+
+    return ret
+
+
+def _select(class_ids, confidences, threshold, allowed=None):
+    keep = confidences >= threshold
+    if allowed is not None:
+        keep &= np.isin(class_ids, allowed)
+
+    return keep
+
+
+class DetectorBackend:
+    """
+    Common interface for object detection backends.  Subclasses implement load(), infer_batch() and postprocess().
+
+    Args:
+        model_config (str): Backend configuration file.
+        model_file (str): Model weights file.
+        batch_size (int): Frames expected per forward pass.
+        options (dict): Backend specific options.
+    """
+
+    name = None
+    label_file = os.path.join(RESOURCES, "mobilenet_v3", "labels.txt")
+    input_size = 320
+
+    def __init__(self, model_config=None, model_file=None, batch_size=1, options=None):
+        self.model_config = model_config
+        self.model_file = model_file
+        self.batch_size = max(1, int(batch_size))
+        self.options = options if options is not None else {}
+        self.config = {}
+
+    def load(self):
+        raise NotImplementedError()
+
+    def warmup(self):
+        size = int(self.config.get("size", self.input_size))
+        self.infer_batch([np.zeros((size, size, 3), dtype=np.uint8)])
+
+    def infer_batch(self, images):
+        """
+        Runs the model over a list of BGR frames.
+
+        Returns:
+            Raw model output for postprocess().
+        """
+
+        raise NotImplementedError()
+
+    def postprocess(self, output, images, threshold=0.5, classes=None):
+        """
+        Converts raw model output to detections.
+
+        Args:
+            output: Raw output of infer_batch().
+            images (list): Frames passed to infer_batch().
+            threshold (float): Minimum confidence for a detection.
+            classes (numpy.ndarray): Allowed class ids (None keeps all classes).
+
+        Returns:
+            (list):  One detection array (DETECTION_DTYPE) per input frame, in the same order.
+        """
+
+        raise NotImplementedError()
+
+    def detect(self, images, threshold=0.5, classes=None):
+        if images is None or len(images) == 0:
+            return []
+
+        return self.postprocess(self.infer_batch(images), images, threshold=threshold, classes=classes)
+
+
+@register_backend("ssd")
+class SSDBackend(DetectorBackend):
+    """
+    SSD MobileNet through the OpenCV DNN module.  All frames of a batch share a single forward pass.
+    """
+
+    def load(self):
+        if self.model_config is None:
+            self.model_config = os.path.join(RESOURCES, "mobilenet_v3", "ssd_mobilenet_v3_large_coco_2020_01_14.pbtxt")
+
+        if self.model_file is None:
+            self.model_file = os.path.join(RESOURCES, "mobilenet_v3", "frozen_inference_graph.pb")
+
+        self.config = { "size": int(self.options.get("size", self.input_size)) }
+        self.net = cv2.dnn.readNet(self.model_file, self.model_config)
+        return self
+
+    def infer_batch(self, images):
+        size = self.config["size"]
+        blob = cv2.dnn.blobFromImages(list(images), scalefactor=1.0 / 127.5, size=(size, size),
+                                      mean=(127.5, 127.5, 127.5), swapRB=True, crop=False)
+
+        self.net.setInput(blob)
+        return self.net.forward()
+
+    def postprocess(self, output, images, threshold=0.5, classes=None):
+        # Each row is [image_id, class_id, confidence, left, top, right, bottom] with relative coordinates
+        rows = output.reshape(-1, 7)
+        rows = rows[_select(rows[:, 1].astype(np.int32), rows[:, 2], threshold, classes)]
+        image_ids = rows[:, 0].astype(np.int32)
+
+        ret = []
+        for idx, image in enumerate(images):
+            items = rows[image_ids == idx]
+            height, width = image.shape[:2]
+            ret.append(make_detections(items[:, 1], items[:, 2], items[:, 3] * width, items[:, 4] * height,
+                                       items[:, 5] * width, items[:, 6] * height))
+
+        return ret
+
+
+@register_backend("yolo")
+class YOLOBackend(DetectorBackend):
+    """
+    YOLO through its PyTorch hub style package (yolov7 by default or the "library" named in the config file).
+    """
+
+    label_file = os.path.join(RESOURCES, "yolov7", "labels.txt")
+    input_size = 640
+
+    def load(self):
+        if self.model_config is None:
+            self.model_config = os.path.join(RESOURCES, "yolov7", "config.json")
+
+        if self.model_file is None:
+            self.model_file = os.path.join(RESOURCES, "yolov7", "yolov7-tiny.pt")
+
+        self.config = {}
+        if os.path.isfile(self.model_config):
+            with open(self.model_config, "r", encoding="UTF-8") as fp:
+                self.config = json.load(fp)
+
+        self.config.update(self.options)
+
+        library = importlib.import_module(self.config.get("library", "yolov7"))
+        self.model = library.load(self.model_file)
+        self.model.conf = self.config.get("confidence", 0.25)
+        self.model.iou = self.config.get("iou", 0.45)
+        return self
+
+    def infer_batch(self, images):
+        return self.model(list(images), size=int(self.config.get("size", self.input_size)), augment=self.config.get("augment"))
+
+    def postprocess(self, output, images, threshold=0.5, classes=None):
+        ret = []
+
+        for idx in range(len(images)):
+            # Rows are [left, top, right, bottom, confidence, class_id]
+            pred = output.pred[idx]
+            pred = (pred.cpu().numpy() if hasattr(pred, "cpu") else np.asarray(pred)).reshape(-1, 6)
+            pred = pred[_select(pred[:, 5].astype(np.int32), pred[:, 4], threshold, classes)]
+
+            ret.append(make_detections(pred[:, 5], pred[:, 4], pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]))
+
+        return ret
+
+
+@register_backend("onnx")
+class ONNXBackend(DetectorBackend):
+    """
+    YOLO-format ONNX model (rows of [cx, cy, w, h, objectness, class scores...]) on ONNX Runtime's CPU provider.
+
+    Options (object.onnx.*):
+        size (int): Model input size.
+        iou (float): Non-maximum suppression overlap threshold.
+        intra_op_threads (int): Threads used within an operator (0 lets ONNX Runtime decide).
+        inter_op_threads (int): Threads used across operators (0 lets ONNX Runtime decide).
+        quantize (bool): Quantize the weights to INT8 (saved next to the model and reused) before loading.
+    """
+
+    label_file = os.path.join(RESOURCES, "yolov7", "labels.txt")
+    input_size = 640
+    logger = logging.getLogger("KNZY-ONNX")
+
+    def load(self):
+        if onnxruntime is None:
+            raise ModuleNotFoundError("The onnx object model requires onnxruntime (pip install onnxruntime)")
+
+        if self.model_file is None:
+            raise ValueError("object.model_file is required for the onnx object model")
+
+        self.config = {
+            "size": int(self.options.get("size", self.input_size)),
+            "iou": float(self.options.get("iou", 0.45))
+        }
+
+        model_file = os.path.expanduser(self.model_file)
+        if self.options.get("quantize", False):
+            model_file = self.quantize(model_file)
+
+        opts = onnxruntime.SessionOptions()
+        opts.intra_op_num_threads = int(self.options.get("intra_op_threads", 0))
+        opts.inter_op_num_threads = int(self.options.get("inter_op_threads", 0))
+        opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = onnxruntime.InferenceSession(model_file, sess_options=opts, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Models exported with a fixed batch dimension are run one frame at a time
+        self.fixed_batch = isinstance(model_input.shape[0], int)
+        return self
+
+    def quantize(self, model_file):
+        quantized_file = os.path.splitext(model_file)[0] + ".int8.onnx"
+        if os.path.isfile(quantized_file) and os.path.getmtime(quantized_file) >= os.path.getmtime(model_file):
+            return quantized_file
+
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        self.logger.info(f"Quantizing {model_file} to INT8")
+        quantize_dynamic(model_file, quantized_file, weight_type=QuantType.QUInt8)
+        return quantized_file
+
+    def _letterbox(self, image):
+        # Resize keeping the aspect ratio and pad to a square input
+        size = self.config["size"]
+        height, width = image.shape[:2]
+        ratio = min(size / float(height), size / float(width))
+        new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+        pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+        canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+        canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        return canvas, ratio, pad_x, pad_y
+
+    def infer_batch(self, images):
+        letterboxed = [self._letterbox(x) for x in images]
+
+        # BGR HWC uint8 to RGB NCHW float in [0, 1]
+        blob = np.stack([x[0] for x in letterboxed])[..., ::-1].transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+
+        if self.fixed_batch:
+            output = np.concatenate([self.session.run(None, { self.input_name: blob[x:x + 1] })[0] for x in range(len(images))])
+        else:
+            output = self.session.run(None, { self.input_name: blob })[0]
+
+        return output, [x[1:] for x in letterboxed]
+
+    def postprocess(self, output, images, threshold=0.5, classes=None):
+        predictions, transforms = output
+        ret = []
+
+        for idx, (pred, (ratio, pad_x, pad_y)) in enumerate(zip(predictions, transforms)):
+            scores = pred[:, 5:] * pred[:, 4:5]
+            class_ids = np.argmax(scores, axis=1)
+            confidences = scores[np.arange(len(scores)), class_ids]
+
+            keep = _select(class_ids, confidences, threshold, classes)
+            if not np.any(keep):
+                ret.append(make_detections())
+                continue
+
+            boxes = pred[keep, :4]
+            class_ids = class_ids[keep]
+            confidences = confidences[keep]
+
+            # Center/size in letterbox coordinates to left/top/width/height in frame coordinates
+            height, width = images[idx].shape[:2]
+            left = np.clip((boxes[:, 0] - boxes[:, 2] / 2 - pad_x) / ratio, 0, width)
+            top = np.clip((boxes[:, 1] - boxes[:, 3] / 2 - pad_y) / ratio, 0, height)
+            right = np.clip((boxes[:, 0] + boxes[:, 2] / 2 - pad_x) / ratio, 0, width)
+            bottom = np.clip((boxes[:, 1] + boxes[:, 3] / 2 - pad_y) / ratio, 0, height)
+
+            # Shift each class into its own area so suppression only happens between boxes of the same class
+            offset = class_ids * float(max(width, height) + 1)
+            rects = np.stack([left + offset, top + offset, right - left, bottom - top], axis=1).tolist()
+            selected = cv2.dnn.NMSBoxes(rects, confidences.tolist(), threshold, self.config["iou"])
+
+            selected = np.array(selected, dtype=np.int64).flatten()
+            ret.append(make_detections(class_ids[selected], confidences[selected], left[selected], top[selected],
+                                       right[selected], bottom[selected]))
+
+        return ret
@@ -5,6 +5,7 @@ import face_recognition
 import logging
 import uuid
 import kenzy.settings
+from kenzy.image.backends import BACKENDS, get_backend, class_filter, detections_to_objects
 
 
 def image_gray(image=None):
@@ -75,16 +76,8 @@ def object_labels(label_file=None, model_type="ssd"):
         if model_type is None:
             model_type = "ssd"
 
-        if model_type == "yolo":
-            label_file = os.path.join(os.path.dirname(__file__), 
-                                      "resources", 
-                                      "yolov7", 
-                                      "labels.txt")
-        else:
-            label_file = os.path.join(os.path.dirname(__file__), 
-                                      "resources", 
-                                      "mobilenet_v3", 
-                                      "labels.txt")
+        backend = BACKENDS.get(model_type, BACKENDS.get("ssd"))
+        label_file = backend.label_file
             
     labels = []
     if label_file is not None and os.path.isfile(label_file):
@@ -95,201 +88,265 @@ def object_labels(label_file=None, model_type="ssd"):
     return labels
 
 
-def object_model(model_type="ssd", model_config=None, model_file=None):
-    ret = None
+def object_model(model_type="ssd", model_config=None, model_file=None, batch_size=1, options=None):
+    """
+    Loads the detector backend registered for model_type (see kenzy.image.backends).
 
-    if model_type == "yolo":
-        if model_config is None:
-            model_config = os.path.join(
-                os.path.dirname(__file__), 
-                "resources", 
-                "yolov7", 
-                "config.json")
-            
-        if model_file is None:
-            model_file = os.path.join(
-                os.path.dirname(__file__), 
-                "resources", 
-                "yolov7", 
-                "yolov7-tiny.pt")
-        
-        if os.path.isfile(model_config):
-            import json
-            with open(model_config, "r", encoding="UTF-8") as fp:
-                cfg = json.load(fp)
-
-        exec("import " + cfg.get("library", "yolov7"))
-        model = eval(cfg.get("library", "yolov7") + ".load(model_file)")
-        model.conf = cfg.get("confidence", 0.25)
-        model.iou = cfg.get("iou", 0.45)
-
-        ret = { "model": model, "config": cfg, "type": "yolo" }
-
-    elif model_type == "ssd":
-        if model_config is None:
-            model_config = os.path.join(
-                os.path.dirname(__file__), 
-                "resources", 
-                "mobilenet_v3", 
-                "ssd_mobilenet_v3_large_coco_2020_01_14.pbtxt")
-            
-        if model_file is None:
-            model_file = os.path.join(
-                os.path.dirname(__file__), 
-                "resources", 
-                "mobilenet_v3", 
-                "frozen_inference_graph.pb")
+    Args:
+        model_type (str): Backend name (ssd, yolo, onnx or any registered backend).
+        model_config (str): Backend configuration file.
+        model_file (str): Model weights file.
+        batch_size (int): Frames expected per forward pass.
+        options (dict): Backend specific options.
 
-        model = cv2.dnn_DetectionModel(model_file, model_config)
-        model.setInputSize(320, 320)  # greater this value the better the results; tune it for best output
-        model.setInputScale(1.0 / 127.5)
-        model.setInputMean((127.5, 127.5, 127.5))
-        model.setInputSwapRB(True)
+    Returns:
+        (dict):  Model definition used by object_detection() and object_detection_batch().
+    """
 
-        ret = { "model": model, "config": {}, "type": "ssd" }
+    if model_type is None:
+        model_type = "ssd"
 
-    return ret
+    backend = get_backend(model_type=model_type, model_config=model_config, model_file=model_file, batch_size=batch_size, options=options)
 
+    return { "backend": backend, "config": backend.config, "type": model_type }
 
-def object_detection(image=None, model=None, labels=None, threshold=0.5, markup=False, line_color=(255, 0, 0), font_color=(255, 255, 255)):
 
-    objects = []
+def object_detection(image=None, model=None, labels=None, threshold=0.5, markup=False, line_color=(255, 0, 0), font_color=(255, 255, 255), 
+                     classes=None):
 
     if image is None or model is None:
-        return objects
-
-    if model.get("type") == "yolo":
-        results = model.get("model")(
-            image, 
-            size=int(model.get("config", {}).get("size", 640)), 
-            augment=model.get("config", {}).get("augment"))
-
-        predictions = results.pred[0]
-
-        for item in predictions:
-            conf = item[4]
-            if conf < threshold:
-                continue
-
-            bounding_box = (int(item[0]), int(item[1]), int(item[2]) - int(item[0]), int(item[3]) - int(item[1]))
-            classInd = int(item[5])
-
-            class_name = None
-            if labels is not None and classInd >= 0 and classInd < len(labels):
-                class_name = labels[classInd]
-
-            left = bounding_box[0]
-            top = bounding_box[1]
-            right = bounding_box[0] + bounding_box[2]
-            bottom = bounding_box[1] + bounding_box[3]
-
-            if isinstance(objects, list):
-                objects.append({ 
-                    "type": "object", 
-                    "confidence": float(conf), 
-                    "name": class_name,
-                    "location": { 
-                        "left": int(left), 
-                        "top": int(top), 
-                        "right": int(right), 
-                        "bottom": int(bottom) 
-                    } 
-                })
-
-            if markup:
-                cv2.rectangle(image, (left, top), (right, bottom), line_color, 2)
-                if class_name is not None:
-                    cv2.rectangle(image, (left, bottom - 18), (right, bottom), line_color, cv2.FILLED)
-                    font = cv2.FONT_HERSHEY_DUPLEX
-                    cv2.putText(image, class_name, (left + 6, bottom - 6), font, 0.5, font_color, 1)
+        return []
 
-    else:
-        classIndex, confidence, bbox = model.get("model").detect(image, confThreshold=threshold)
+    objects = object_detection_batch(images=[image], model=model, labels=labels, threshold=threshold, classes=classes)[0]
 
-        try:
-            for classInd, conf, bounding_box in zip(classIndex.flatten(), confidence.flatten(), bbox):
-                class_name = None
-                if labels is not None and classInd >= 0 and classInd < len(labels):
-                    class_name = labels[classInd]
-
-                left = bounding_box[0]
-                top = bounding_box[1]
-                right = bounding_box[0] + bounding_box[2]
-                bottom = bounding_box[1] + bounding_box[3]
-
-                if isinstance(objects, list):
-                    objects.append({ 
-                        "type": "object", 
-                        "confidence": float(conf), 
-                        "name": class_name,
-                        "location": { 
-                            "left": int(left), 
-                            "top": int(top), 
-                            "right": int(right), 
-                            "bottom": int(bottom) 
-                        } 
-                    })
-
-                if markup:
-                    cv2.rectangle(image, (left, top), (right, bottom), line_color, 2)
-                    if class_name is not None:
-                        cv2.rectangle(image, (left, bottom - 18), (right, bottom), line_color, cv2.FILLED)
-                        font = cv2.FONT_HERSHEY_DUPLEX
-                        cv2.putText(image, class_name, (left + 6, bottom - 6), font, 0.5, font_color, 1)
-
-        except AttributeError:
-            pass
+    if markup:
+        for item in objects:
+            loc = item.get("location")
+            left, top, right, bottom = loc.get("left"), loc.get("top"), loc.get("right"), loc.get("bottom")
+            class_name = item.get("name")
+
+            cv2.rectangle(image, (left, top), (right, bottom), line_color, 2)
+            if class_name is not None:
+                cv2.rectangle(image, (left, bottom - 18), (right, bottom), line_color, cv2.FILLED)
+                font = cv2.FONT_HERSHEY_DUPLEX
+                cv2.putText(image, class_name, (left + 6, bottom - 6), font, 0.5, font_color, 1)
     
     return objects
 
 
+def object_detection_batch(images=None, model=None, labels=None, threshold=0.5, classes=None, structured=False):
+    """
+    Runs a single forward pass over several frames.
+
+    Args:
+        images (list): Frames to analyze (may differ in size).
+        model (dict): Model as returned by object_model().
+        labels (list): Class labels as returned by object_labels().
+        threshold (float): Minimum confidence for a detection.
+        classes (list): Class names to keep (None keeps all classes).
+        structured (bool): Return detection arrays (see kenzy.image.backends.DETECTION_DTYPE) instead of dictionaries.
+
+    Returns:
+        (list):  One list of detected objects (or detection array) per input frame, in the same order.
+    """
+
+    if images is None or len(images) == 0 or model is None:
+        return []
+
+    ret = model.get("backend").detect(list(images), threshold=threshold, classes=class_filter(labels, classes))
+    if structured:
+        return ret
+
+    return [detections_to_objects(x, labels) for x in ret]
+
+
+def get_regions(elements, width, height, padding=0.0, scale=1.0, min_size=0):
+    """
+    Converts element locations into padded regions clipped to the image bounds.
+
+    Args:
+        elements (list): Items with a "location" dict (left, top, right, bottom) or a detection array.
+        width (int): Image width.
+        height (int): Image height.
+        padding (float): Padding added to each side as a fraction of the element's width/height.
+        scale (float): Scale applied to the locations before padding (e.g. when the image was resized).
+        min_size (int): Minimum width/height of a region in pixels (grown around its center).
+
+    Returns:
+        (list):  Regions as (left, top, right, bottom) tuples.
+    """
+
+    if isinstance(elements, np.ndarray):
+        boxes = zip(elements["left"].tolist(), elements["top"].tolist(), elements["right"].tolist(), elements["bottom"].tolist())
+    else:
+        boxes = [(x.get("location", {}).get("left", 0), x.get("location", {}).get("top", 0), 
+                  x.get("location", {}).get("right", 0), x.get("location", {}).get("bottom", 0)) for x in elements]
+
+    regions = []
+    for box in boxes:
+        left, top, right, bottom = [x * scale for x in box]
+
+        pad_x = max((right - left) * padding, (min_size - (right - left)) / 2.0)
+        pad_y = max((bottom - top) * padding, (min_size - (bottom - top)) / 2.0)
+
+        region = (
+            max(0, int(left - pad_x)),
+            max(0, int(top - pad_y)),
+            min(int(width), int(right + pad_x)),
+            min(int(height), int(bottom + pad_y))
+        )
+
+        if region[2] > region[0] and region[3] > region[1]:
+            regions.append(region)
+
+    return regions
+
+
+def merge_regions(regions, gap=0):
+    """
+    Merges overlapping regions (or regions within gap pixels of each other) into their bounding boxes.
+
+    Args:
+        regions (list): Regions as (left, top, right, bottom) tuples.
+        gap (int): Distance in pixels at which two regions are considered touching.
+
+    Returns:
+        (list):  Non-overlapping regions as (left, top, right, bottom) tuples.
+    """
+
+    merged = [list(x) for x in regions]
+
+    changed = True
+    while changed:
+        changed = False
+        ret = []
+        for region in merged:
+            for item in ret:
+                if region[0] <= item[2] + gap and item[0] <= region[2] + gap \
+                        and region[1] <= item[3] + gap and item[1] <= region[3] + gap:
+                    item[0] = min(item[0], region[0])
+                    item[1] = min(item[1], region[1])
+                    item[2] = max(item[2], region[2])
+                    item[3] = max(item[3], region[3])
+                    changed = True
+                    break
+            else:
+                ret.append(region)
+
+        merged = ret
+
+    return [tuple(x) for x in merged]
+
+
+def get_face_locations(image, model="hog", regions=None):
+    """
+    Finds face outlines as (top, right, bottom, left) tuples, optionally only inside the supplied regions.
+
+    Args:
+        image (numpy.ndarray): Image to search.
+        model (str): face_recognition detection model ("hog" or "cnn").
+        regions (list): Regions as (left, top, right, bottom) tuples or None for the full image.
+    """
+
+    if regions is None:
+        return face_recognition.face_locations(image, model=model)
+
+    face_locations = []
+    for (r_left, r_top, r_right, r_bottom) in regions:
+        for (top, right, bottom, left) in face_recognition.face_locations(image[r_top:r_bottom, r_left:r_right], model=model):
+            face_locations.append((top + r_top, right + r_left, bottom + r_top, left + r_left))
+
+    return face_locations
+
+
+def recognize_faces(image, face_locations, face_encodings=None, face_names=None, tolerance=0.6, default_name="Unknown", cache_folder=None, 
+                    gallery=None, face_cache=None, found_encodings=None):
+    """
+    Encodes the faces at the given locations and matches them against the known encodings.
+
+    Args:
+        gallery (FaceGallery): Known faces to search (used instead of face_encodings/face_names when provided).
+        face_cache (FaceCache): Index used to name and save new faces (used instead of cache_folder when provided).
+        found_encodings (list): Encodings already computed for face_locations (e.g. by a worker process).
+
+    Returns:
+        (tuple):  List of names and list of distances (None when not a confident match) in location order.
+    """
+
+    found_names = []
+    found_distances = []
+
+    # Determine whose face this is
+    fes = found_encodings if found_encodings is not None else face_recognition.face_encodings(image, face_locations)
+
+    # All faces in the frame are matched against the gallery in one pass
+    best_matches = None
+    if gallery is not None:
+        best_matches = gallery.search(fes)
+
+    for idx, face_encoding in enumerate(fes):
+        name = None
+        best_match_index = None
+        best_distance = None
+        match_name = None
+        distance = None
+
+        if best_matches is not None:
+            if best_matches[0][idx] >= 0:
+                best_match_index = int(best_matches[0][idx])
+                best_distance = float(best_matches[1][idx])
+                match_name = gallery.get_name(best_match_index)
+        else:
+            face_distances = face_recognition.face_distance(face_encodings, face_encoding)
+            if face_distances is not None and len(face_distances) > 0:
+                best_match_index = np.argmin(face_distances)
+                best_distance = face_distances[best_match_index]
+                match_name = face_names[best_match_index] if best_match_index < len(face_names) else None
+
+        if best_match_index is not None and best_distance < tolerance and match_name is not None:
+            name = match_name
+            distance = best_distance
+        
+        if name is None:
+            if best_match_index is not None and best_distance > (tolerance * 1.5):
+                name = save_image_to_cache(image, face_position=face_locations[idx], cache_folder=cache_folder, 
+                                           default_name=default_name, face_encoding=face_encoding, 
+                                           known_face_encodings=face_encodings, face_names=face_names, gallery=gallery, 
+                                           face_cache=face_cache)
+            elif best_match_index is not None and best_distance < (tolerance * 1.5) and match_name is not None:
+                name = match_name
+            else:
+                name = default_name
+
+        found_names.append(name)
+        found_distances.append(distance)
+
+    return found_names, found_distances
+
+
 def face_detection(image, model="hog", face_encodings=None, face_names=None, tolerance=0.6, default_name=None, 
-                   markup=False, line_color=(255, 0, 0), font_color=(255, 255, 255), cache_folder=None):
+                   markup=False, line_color=(255, 0, 0), font_color=(255, 255, 255), cache_folder=None, regions=None, gallery=None, 
+                   face_cache=None, found_locations=None, found_encodings=None):
 
     if default_name is None:
         default_name = "Unknown"
 
     faces = []
-    face_locations = []
 
-    # Find face outline
-    face_locations = face_recognition.face_locations(image, model=model)
+    # Find face outline (optionally only inside the supplied (left, top, right, bottom) regions)
+    face_locations = found_locations if found_locations is not None else get_face_locations(image, model=model, regions=regions)
     if face_locations is None or len(face_locations) < 1:
         return []
 
     found_names = None
     found_distances = None
 
-    if face_encodings is not None and face_names is not None:
-        # Determine whose face this is
-        fes = face_recognition.face_encodings(image, face_locations)
+    has_known = gallery is not None or (face_encodings is not None and face_names is not None)
 
-        found_names = []
-        found_distances = []
-        for idx, face_encoding in enumerate(fes):
-            name = None
-            best_match_index = None
-            distance = None
-
-            face_distances = face_recognition.face_distance(face_encodings, face_encoding)
-            if face_distances is not None and len(face_distances) > 0:
-                best_match_index = np.argmin(face_distances)
-                if face_distances[best_match_index] < tolerance and best_match_index < len(face_names):
-                    name = face_names[best_match_index]
-                    distance = face_distances[best_match_index]
-            
-            if name is None:
-                if best_match_index is not None and len(face_distances) > best_match_index and face_distances[best_match_index] > (tolerance * 1.5):
-                    name = save_image_to_cache(image, face_position=face_locations[idx], cache_folder=cache_folder, 
-                                               default_name=default_name, face_encoding=face_encoding, 
-                                               known_face_encodings=face_encodings, face_names=face_names)
-                elif best_match_index is not None and len(face_distances) > best_match_index and face_distances[best_match_index] < (tolerance * 1.5):
-                    name = face_names[best_match_index]
-                else:
-                    name = default_name
-
-            found_names.append(name)
-            found_distances.append(distance)
+    if has_known:
+        found_names, found_distances = recognize_faces(image, face_locations, face_encodings=face_encodings, face_names=face_names, 
+                                                       tolerance=tolerance, default_name=default_name, cache_folder=cache_folder, 
+                                                       gallery=gallery, face_cache=face_cache, found_encodings=found_encodings)
 
     for idx, (top, right, bottom, left) in enumerate(face_locations):
 
@@ -299,7 +356,7 @@ def face_detection(image, model="hog", face_encodings=None, face_names=None, tol
         if markup:
             cv2.rectangle(image, (left, top), (right, bottom), line_color, 2)
 
-            if face_encodings is not None and face_names is not None:
+            if has_known:
                 cv2.rectangle(image, (left, bottom - 18), (right, bottom), line_color, cv2.FILLED)
                 font = cv2.FONT_HERSHEY_DUPLEX
                 cv2.putText(image, found_names[idx] if found_names is not None else "", (left + 6, bottom - 6), font, 0.5, font_color, 1)
@@ -354,14 +411,15 @@ def image_resize(image, scale_factor):
 
 
 def save_image_to_cache(image, face_position=None, cache_folder=None, default_name="Unknown", 
-                        face_encoding=None, known_face_encodings=None, face_names=None):
+                        face_encoding=None, known_face_encodings=None, face_names=None, gallery=None, face_cache=None):
     
-    if cache_folder is None:
+    if cache_folder is None and face_cache is None:
         return default_name
 
-    cache_folder = os.path.expanduser(cache_folder)
+    if face_cache is None:
+        cache_folder = os.path.expanduser(cache_folder)
 
-    if not os.path.isdir(cache_folder):
+    if face_cache is None and not os.path.isdir(cache_folder):
         try:
             os.makedirs(cache_folder, exist_ok=True)
         except Exception:
@@ -382,6 +440,18 @@ def save_image_to_cache(image, face_position=None, cache_folder=None, default_na
     cropped_im = image[top:bottom, left:right]
     cropped_im = cv2.cvtColor(cropped_im, cv2.COLOR_BGR2RGB)
 
+    if face_cache is not None:
+        # Only the JPEG encode happens here; the file and index writes are done by the cache's writer thread
+        ret, buffer = cv2.imencode(".jpg", cropped_im)
+        if not ret:
+            return default_name
+
+        face_name = face_cache.add(buffer.tobytes())
+        if gallery is not None and face_encoding is not None:
+            gallery.add(face_name, face_encoding)
+
+        return face_name
+
     uid = uuid.uuid4()
     file_name = os.path.join(cache_folder, f"{uid}.jpg")
     face_name = get_next_cache_name(cache_folder=cache_folder, default_name=default_name)
@@ -399,7 +469,9 @@ def save_image_to_cache(image, face_position=None, cache_folder=None, default_na
 
         kenzy.settings.save(data, os.path.join(cache_folder, "cache.yml"))
 
-        if isinstance(known_face_encodings, list) and face_encoding is not None and isinstance(face_names, list) and face_name is not None:
+        if gallery is not None and face_encoding is not None and face_name is not None:
+            gallery.add(face_name, face_encoding)
+        elif isinstance(known_face_encodings, list) and face_encoding is not None and isinstance(face_names, list) and face_name is not None:
             known_face_encodings.append(face_encoding)
             face_names.append(face_name)
 
@@ -7,84 +7,82 @@ import queue
 import time
 from datetime import datetime
 import logging
-import copy
-import collections
 import math
 import sys
 import traceback
+import numpy as np
 from kenzy.core import KenzySuccessResponse, KenzyErrorResponse
 from kenzy.image.core import image_blur, image_gray, image_rotate, image_resize, \
     object_model, object_labels, get_face_encoding, \
-    motion_detection, object_detection, face_detection
-import kenzy.settings
+    motion_detection, object_detection_batch, face_detection, get_regions, merge_regions, \
+    get_face_locations, recognize_faces
+from kenzy.image.backends import make_detections, offset_detections, class_filter, detection_names, detections_to_objects
+from kenzy.image.faces import FaceTracker, FaceGallery, EncodingStore, FaceCache
+from kenzy.image.frames import FrameRing, FrameHandle
+from kenzy.image.workers import StageWorker, frame_ref
+from kenzy.image.scheduler import LatestSlot, StageScheduler
+from kenzy.image.preroll import PrerollBuffer
 from kenzy.extras import get_status
 # from kenzy.image import core
 
 
-class VideoProcessor:
-    type = "kenzy.image"
-    logger = logging.getLogger("KNZY-IMG")
-    
-    def __init__(self, **kwargs):
-        self.settings = kwargs
-
-        self.face_encodings = None
-        self.face_names = None
-        self.raw_width = None
-        self.raw_height = None
-        self.main_thread = None
-        self.stop_event = threading.Event()
-        self.record_event = threading.Event()
-        self.restart_enabled = False
-
-        self.obj_thread = None
-        self.face_thread = None
-        self.rec_thread = None
-        self.callback_thread = None
-
-        self.obj_queue = None
-        self.face_queue = None
-        self.rec_queue = None
-        self.callback_queue = None
-
-        self.location = kwargs.get("location", "Kenzy's Room")
-        self.group = kwargs.get("group", "Kenzy's Group")
-        self.service = None
+class Camera:
+    """
+    Capture source handled by a VideoProcessor.  Each camera owns its capture loop, pre-roll buffer, recorder and
+    motion state while the processor's inference and callback threads are shared across all cameras.
+
+    Args:
+        processor (VideoProcessor): Processor that owns the shared queues.
+        id (str): Camera identifier reported in the collect context (None for the single legacy camera).
+        video_device (int|str): OpenCV video device index or stream URL.
+        scale (float): Image scaling coefficient.
+        frames_per_second (float): Video FPS.  Auto-calculated if None.
+        orientation (int): Device orientation (0, 90, 180, or 270).
+        record.enabled (bool): Enables/disables video recording.
+        record.format (str): Video output format for saved recordings.
+        record.folder (str): Folder for saved recordings.
+        record.buffer (int): Seconds to buffer pre/post detection.
+        record.buffer_memory (int): Maximum megabytes of encoded pre-roll frames.
+        record.buffer_quality (int): JPEG quality of pre-roll frames.
+        frame_ring.slots (int): Frames preallocated for capture (0 sizes the ring from the pre-roll and queue depths).
+    """
+
+    logger = logging.getLogger("KNZY-CAM")
+
+    def __init__(self, processor, id=None, **kwargs):
+        self.processor = processor
+        self.id = str(id) if id is not None else None
 
         self.video_device = kwargs.get("video_device", 0)
         self.scale_factor = kwargs.get("scale", 1.0)
         self.frames_per_second = kwargs.get("frames_per_second")
-
         self.orientation = kwargs.get("orientation", 0)
 
-        self.motion_enabled = kwargs.get("motion.detection", True)
-        self.motion_threshold = kwargs.get("motion.threshold", 20)
-        self.motion_area = kwargs.get("motion.area", 0.0003)
-
-        self.object_detection = kwargs.get("object.detection", True)
-        self.object_threshold = kwargs.get("object.threshold", 0.6)
-        self.object_model_type = kwargs.get("object.model_type", "ssd")
-        self.object_model_config = kwargs.get("object.model_config")
-        self.object_model_file = kwargs.get("object.model_file")
-        self.object_label_file = kwargs.get("objects.label_file")
-
-        self.face_detection = kwargs.get("face.detection", True)
-        self.face_recognition = kwargs.get("face.recognition", True)
-        self.face_tolerance = kwargs.get("face.tolerance", 0.5)
-        self.default_name = kwargs.get("face.default_name")
-        self.cache_folder = kwargs.get("face.cache_folder")
-
         self.record_enabled = kwargs.get("record.enabled", True)
         self.video_format = kwargs.get("record.format", "XVID")
         self.video_folder = kwargs.get("record.folder")
         self.record_buffer = kwargs.get("record.buffer", 5)
-        
-        self.initialize_settings()
+        self.buffer_memory = kwargs.get("record.buffer_memory", 64)
+        self.buffer_quality = kwargs.get("record.buffer_quality", 90)
+        self.ring_slots = int(kwargs.get("frame_ring.slots", 0))
 
-    def initialize_settings(self):
-        self.face_encodings = None
-        self.face_names = None
+        self.raw_width = None
+        self.raw_height = None
 
+        self.read_thread = None
+        self.rec_thread = None
+        self.rec_queue = None
+        self.record_event = threading.Event()
+        self.recording_stop_time = 0
+        self.last_person_seen = 0
+        self.last_image = None
+        self.last_objects = None
+        self.last_detection = 0
+        self.face_tracker = None
+        self.preroll = None
+        self.frame_ring = None
+
+    def initialize(self):
         dev = cv2.VideoCapture(self.video_device)
 
         if self.frames_per_second is None:
@@ -103,195 +101,79 @@ class VideoProcessor:
             self.raw_width = frame.shape[1]
             self.raw_height = frame.shape[0]
 
-        if self.settings.get("face.entries") is not None:
-            self.face_names = []
-            self.face_encodings = []
-            for face_name in self.settings.get("face.entries", {}):
-                image_list = self.settings.get("face.entries", {}).get(face_name)
-                if isinstance(image_list, list):
-                    for img in image_list:
-                        self.face_encodings.append(get_face_encoding(img))    
-                        self.face_names.append(face_name)
-                else:
-                    self.face_encodings.append(get_face_encoding(image_list))
-                    self.face_names.append(face_name)
-
-        if self.cache_folder is not None:
-            cache_folder = os.path.expanduser(self.cache_folder)
-            if os.path.isfile(os.path.join(cache_folder, "cache.yml")):
-                
-                if self.face_names is None:
-                    self.face_names = []
-                
-                if self.face_encodings is None:
-                    self.face_encodings = []
-
-                data = kenzy.settings.load(os.path.join(cache_folder, "cache.yml"))
-                for face_name in data:
-                    try:
-                        img = os.path.join(cache_folder, data[face_name])
-                        self.face_encodings.append(get_face_encoding(img))    
-                        self.face_names.append(face_name)
-                    except Exception:
-                        pass
-
         if self.video_folder is not None:
             self.video_folder = os.path.expanduser(self.video_folder)
 
-        self.frame_buffer = collections.deque(maxlen=int(self.frames_per_second * self.record_buffer))
+        self.preroll = PrerollBuffer(seconds=self.record_buffer, frames_per_second=self.frames_per_second,
+                                     memory_limit=int(float(self.buffer_memory) * 1024 * 1024), quality=self.buffer_quality)
         self.recording_stop_time = 0
 
-    def _process_motion_and_objects(self):
-        last_image = None
-        skip = 0
-
-        self.logger.debug("Starting object and motion detection thread")
-
-        frames_per_second = self.frames_per_second
-
-        model_labels = object_labels(label_file=self.object_label_file, model_type=self.object_model_type)
-        model = object_model(model_type=self.object_model_type, model_config=self.object_model_config, model_file=self.object_model_file)
-
-        last_person_seen = 0
-
-        self.logger.debug("Object and motion detection thread started")
+    def _create_ring(self, frame):
+        slots = self.ring_slots
+        if slots <= 0:
+            # Every frame that can be queued or in flight, with a second of slack for the recorder
+            slots = self.processor.frames_in_flight() + int(math.ceil(self.frames_per_second)) + 2
+            if self.record_enabled and self.preroll.enabled:
+                slots += self.preroll.max_pending + 1
 
-        while True:
-            data = self.obj_queue.get()
-            if data is None or not isinstance(data, dict):
-                break
-
-            if skip > 0:
-                skip = skip - 1
-                continue
-
-            start = time.time()
+        self.logger.debug(f"Allocating {slots} frames of {frame.shape} for capture")
+        return FrameRing(frame.shape, slots, dtype=frame.dtype, shared=self.processor.execution_mode == "process")
 
-            movements = None
-            objects = None
-
-            # Motion
-            if self.motion_enabled:
-                image = image_gray(data["frame"])
-                image = image_blur(image)
-                last_image_hold = copy.copy(image)
-                movements = motion_detection(image=image, last_image=last_image, threshold=self.motion_threshold, motion_area=self.motion_area)
-                last_image = last_image_hold
-
-            # Object
-            if self.object_detection:
-                objects = object_detection(image=data["frame"], model=model, labels=model_labels, threshold=self.object_threshold)
-
-            end = time.time()
-            
-            if (end - start) > 0:
-                actual_fps = int(float(1 / (end - start)))  
-                if actual_fps < frames_per_second:
-                    if actual_fps > 0:
-                        skip = math.ceil(frames_per_second / actual_fps) - 1
-
-            ret = []
-            if movements is not None:
-                ret.extend(movements)
-
-            if objects is not None:
-                ret.extend(objects)
-
-            curr_time = data.get("timestamp")
-
-            rec_stop_time = self.recording_stop_time  # attempt to avoid segfault (should be atomic call)
-            if objects is not None and "person" in [x.get("name") for x in objects]:
-                if not self.record_event.is_set():
-                    self.record_event.set()
-                last_person_seen = curr_time
-                self.recording_stop_time = 0
-                rec_stop_time = 0
-
-            elif rec_stop_time == 0 and self.record_event.is_set() and (last_person_seen + self.record_buffer) < curr_time:
-                self.recording_stop_time = curr_time
-
-            for item in ret:
-                item["timestamp"] = curr_time
-
-            self.callback_queue.put(ret)
-            self.obj_queue.task_done()
-        
-    def _process_faces(self):
-        skip = 0
-
-        time.sleep(2)
-        self.logger.debug("Starting face detection thread")
-
-        frames_per_second = self.frames_per_second
-        
-        model_labels = object_labels(label_file=self.object_label_file, model_type=self.object_model_type)
-        model = object_model(model_type=self.object_model_type, model_config=self.object_model_config, model_file=self.object_model_file)
-
-        self.logger.debug("Face detection thread started")
-        
-        while True:
-            data = self.face_queue.get()
-            if data is None or not isinstance(data, dict):
-                break
+    def release_frames(self):
+        if self.preroll is not None:
+            self.preroll.clear()
 
-            if skip > 0:
-                skip = skip - 1
-                continue
+        if self.frame_ring is not None:
+            self.frame_ring.close()
+            self.frame_ring = None
 
-            start = time.time()
+    def start(self):
+        self.record_event.clear()
+        self.release_frames()
+        self.last_image = None
+        self.last_objects = None
+        self.last_detection = 0
+        self.last_person_seen = 0
+        self.recording_stop_time = 0
 
-            faces = []
-            hasFace = False
-            width_calc = 100000
-            objects = object_detection(image=data["frame"], model=model, labels=model_labels, threshold=self.object_threshold)
-            if objects is not None:
-                for item in objects:
-                    if item["name"] == "person":
-                        hasFace = True
-                        
-                        loc = item["location"]
-                        left = loc["left"]
-                        right = loc["right"]
-                        new_calc = right - left
-                        if new_calc < width_calc:
-                            width_calc = new_calc
+        if self.record_enabled:
+            self.preroll.start()
 
-            if hasFace and self.face_recognition:
-                image = data["frame"]
+        self.rec_queue = queue.Queue()  # int(self.frame_buffer_size * self.frames_per_second))
+        self.rec_thread = threading.Thread(target=self._process_record, daemon=True)
+        self.rec_thread.start()
 
-                if width_calc > 1000:
-                    image = image_resize(image, 0.2)
-                elif width_calc > 600:
-                    image = image_resize(image, 0.3)
-                elif width_calc > 300:
-                    image = image_resize(image, 0.5)
-                elif width_calc > 200:
-                    image = image_resize(image, 0.7)
+        self.read_thread = threading.Thread(target=self._read_from_device, daemon=True)
+        self.read_thread.start()
 
-                ret = face_detection(image=image, face_encodings=self.face_encodings, face_names=self.face_names, 
-                                     tolerance=self.face_tolerance,
-                                     default_name=self.default_name,
-                                     cache_folder=self.cache_folder)
-                faces.extend(ret)
+    def stop(self):
+        self.record_event.clear()
 
-                end = time.time()
+        if self.read_thread is not None and self.read_thread.is_alive():
+            self.read_thread.join()
 
-                secs = (end - start)
-                if secs == 0:
-                    continue 
+        if self.rec_thread is not None and self.rec_thread.is_alive():
+            self.rec_queue.put(None)
+            self.rec_thread.join()
 
-                if secs > 0:
-                    actual_fps = float(1 / secs)
-                    if actual_fps < frames_per_second:
-                        if actual_fps > 0:
-                            skip = math.ceil(float(frames_per_second) / actual_fps) - 1
+        if self.preroll is not None:
+            self.preroll.stop()
 
-                for item in faces:
-                    item["timestamp"] = data.get("timestamp")
+    def is_alive(self):
+        return (self.read_thread is not None and self.read_thread.is_alive()) \
+            or (self.rec_thread is not None and self.rec_thread.is_alive())
 
-                self.callback_queue.put(faces)
+    def update_recording(self, person_seen, curr_time):
+        rec_stop_time = self.recording_stop_time  # attempt to avoid segfault (should be atomic call)
+        if person_seen:
+            if not self.record_event.is_set():
+                self.record_event.set()
+            self.last_person_seen = curr_time
+            self.recording_stop_time = 0
+            rec_stop_time = 0
 
-            self.face_queue.task_done()
+        elif rec_stop_time == 0 and self.record_event.is_set() and (self.last_person_seen + self.record_buffer) < curr_time:
+            self.recording_stop_time = curr_time
 
     def _process_record(self):
         video_writer = None
@@ -305,7 +187,7 @@ class VideoProcessor:
 
         while True:
             data = self.rec_queue.get()
-            if data is None or not isinstance(data, dict):
+            if data is None or not isinstance(data, FrameHandle):
                 if video_writer is not None:
                     video_writer.release()
                     video_writer = None
@@ -316,7 +198,8 @@ class VideoProcessor:
             if self.video_folder is not None and self.record_event.is_set():
 
                 rec_stop_time = self.recording_stop_time  # Attempt to avoid segfault (should be atomic operation)
-                if rec_stop_time != 0 and rec_stop_time <= data.get("timestamp"):
+                if rec_stop_time != 0 and rec_stop_time <= data.timestamp:
+                    data.release()
                     self.record_event.clear()
                     if video_writer is not None:
                         video_writer.release()
@@ -326,12 +209,16 @@ class VideoProcessor:
                     continue
 
                 if video_writer is None:
-                    ts = datetime.fromtimestamp(data.get("timestamp"))
+                    ts = datetime.fromtimestamp(data.timestamp)
+
+                    file_name = ts.strftime("%Y%m%d_%H%M%S")
+                    if self.id is not None:
+                        file_name += "_" + self.id
 
                     file_name = os.path.join(
-                        self.video_folder, 
-                        ts.strftime("%Y%m%d"), 
-                        ts.strftime("%Y%m%d_%H%M%S") + file_extension
+                        self.video_folder,
+                        ts.strftime("%Y%m%d"),
+                        file_name + file_extension
                     )
                     self.logger.debug(f"Recording to {file_name}")
 
@@ -341,85 +228,55 @@ class VideoProcessor:
                         raise
 
                     video_writer = cv2.VideoWriter(
-                        os.path.join(file_name), 
-                        fourcc, 
-                        math.ceil(self.frames_per_second), 
-                        (data.get("frame").shape[1], data.get("frame").shape[0])
+                        os.path.join(file_name),
+                        fourcc,
+                        math.ceil(self.frames_per_second),
+                        (data.frame.shape[1], data.frame.shape[0])
                     )
 
-                    if self.frame_buffer is not None:
-                        for frame in self.frame_buffer:
-                            video_writer.write(frame)
+                    if self.preroll is not None:
+                        for timestamp, encoded in self.preroll.drain():
+                            frame = PrerollBuffer.decode(encoded)
+                            if frame is not None and frame.shape == data.frame.shape:
+                                video_writer.write(frame)
 
-                        self.frame_buffer.clear()
-                    
-                video_writer.write(data.get("frame"))
+                video_writer.write(data.frame)
 
             else:
                 if video_writer is not None:
                     video_writer.release()
                     video_writer = None
 
+            data.release()
             self.rec_queue.task_done()
 
-    def _process_callback(self):
-        motion = False
-        last_motion = 0
-        faces = {}
-
-        last_motion_notify = False
-        last_object_list = []
-
-        while True:
-            data = self.callback_queue.get()
-            if data is None or not isinstance(data, list):
-                break
-
-            is_face_notice = False
-            objects = []
-            for item in data:
-                if item.get("type") == "movement":
-                    motion = True
-                    last_motion = item.get("timestamp")
-                elif item.get("type") == "object":
-                    objects.append(item)    
-                elif item.get("type") == "face":
-                    faces[item.get("name", "Unknown")] = item
-                    is_face_notice = True
-
-            if motion and (time.time() - 1) > last_motion:
-                motion = False
-
-            if not is_face_notice:
-                object_list = [x.get("name") for x in objects]
-                object_list.sort()
-                if motion != last_motion_notify or object_list != last_object_list:
-                    self.service.collect(data={
-                        "type": "kenzy.image",
-                        "motion": motion,
-                        "objects": objects,
-                        "faces": faces
-                    }, wait=False)
-
-                    last_motion_notify = motion
-                    last_object_list = object_list
-
-            self.callback_queue.task_done()
-
     def _read_from_device(self):
-        self.stop_event.clear()
-        self.record_event.clear()
         read_counter = 0
-        
+
         if self.frames_per_second is None:
             self.logger.critical("Invalid Frames Per Second.  Cancelling start")
             return
-        
+
         dev = cv2.VideoCapture(self.video_device)
+        processor = self.processor
+
+        # Without scaling or rotation the device decodes straight into a ring slot
+        direct = self.scale_factor == 1.0 and not self.orientation
 
         try:
-            while not self.stop_event.is_set():
-                ret, frame = dev.read()
+            while not processor.stop_event.is_set():
+                handle = None
+                if direct and self.frame_ring is not None:
+                    handle = self.frame_ring.acquire(camera=self.id)
+
+                if handle is not None:
+                    ret, frame = dev.read(handle.frame)
+                    if not ret or frame is not handle.frame:
+                        # Frame size changed (or read failed) so the slot wasn't used
+                        handle.release()
+                        handle = None
+                else:
+                    ret, frame = dev.read()
 
                 if not ret:
                     read_counter += 1
@@ -427,46 +284,590 @@ class VideoProcessor:
                         raise Exception("Error, images failing reader.")
                 else:
                     read_counter = 0
-                    if self.scale_factor != 1.0:
-                        frame = image_resize(frame, self.scale_factor)
+                    curr_time = time.time()
 
-                    frame = image_rotate(frame, self.orientation)
+                    if handle is None:
+                        if self.scale_factor != 1.0:
+                            frame = image_resize(frame, self.scale_factor)
 
-                    try:
-                        if self.motion_enabled or self.object_detection:
-                            self.obj_queue.put_nowait({ "frame": frame, "timestamp": time.time() })
-                    except queue.Full:
-                        # self.logger.debug("OBJECTS - Queue full.  Consider increasing frame_buffer_size.")
-                        pass
+                        frame = image_rotate(frame, self.orientation)
 
-                    try:
-                        if self.face_detection:
-                            self.face_queue.put_nowait({ "frame": frame, "timestamp": time.time() })
-                    except queue.Full:
-                        # self.logger.debug("FACES - Queue full.  Consider increasing frame_buffer_size.")
-                        pass
+                        if self.frame_ring is None or self.frame_ring.shape != frame.shape:
+                            self.release_frames()
+                            self.frame_ring = self._create_ring(frame)
 
-                    try:
-                        if self.record_enabled:
-                            if self.record_event.is_set():
-                                self.rec_queue.put_nowait({ "frame": frame, "timestamp": time.time() })
-                            else:
-                                self.frame_buffer.append(frame)
-                    except queue.Full:
-                        # self.logger.debug("RECORD - Queue full.  Consider increasing frame_buffer_size.")
-                        pass
+                        handle = self.frame_ring.write(frame, camera=self.id)
+                        if handle is None:
+                            # All slots are held by slower consumers so this frame is dropped
+                            continue
+
+                    handle.timestamp = curr_time
+
+                    # Face detection is fed from the object thread's detections
+                    if processor.motion_enabled or processor.object_detection or processor.face_detection:
+                        processor.obj_slot.put(self.id, handle.retain())
+
+                    if self.record_enabled:
+                        if self.record_event.is_set():
+                            self.rec_queue.put_nowait(handle.retain())
+                        elif self.preroll.enabled:
+                            self.preroll.put(handle.retain())
+
+                    handle.release()
 
         except KeyboardInterrupt:
-            self.stop()
+            processor.stop()
         except Exception:
             self.logger.warning(f"Video read failed from {self.video_device}")
             self.logger.error(str(sys.exc_info()[0]))
             self.logger.error(str(traceback.format_exc()))
             self.logger.debug("Flagging for restart.")
-            self.restart_enabled = True
+            processor.restart_enabled = True
 
         dev.release()
 
+
+class VideoProcessor:
+    type = "kenzy.image"
+    logger = logging.getLogger("KNZY-IMG")
+
+    def __init__(self, **kwargs):
+        self.settings = kwargs
+
+        self.face_gallery = None
+        self.stop_event = threading.Event()
+        self.restart_enabled = False
+
+        self.obj_thread = None
+        self.face_threads = []
+        self.callback_thread = None
+        self.object_workers = []
+        self.face_workers = []
+        self.face_lock = threading.Lock()
+
+        self.obj_slot = LatestSlot()
+        self.face_slot = LatestSlot()
+        self.callback_queue = None
+
+        self.location = kwargs.get("location", "Kenzy's Room")
+        self.group = kwargs.get("group", "Kenzy's Group")
+        self.service = None
+
+        self.motion_enabled = kwargs.get("motion.detection", True)
+        self.motion_threshold = kwargs.get("motion.threshold", 20)
+        self.motion_area = kwargs.get("motion.area", 0.0003)
+
+        self.object_detection = kwargs.get("object.detection", True)
+        self.object_threshold = kwargs.get("object.threshold", 0.6)
+        self.object_model_type = kwargs.get("object.model_type", "ssd")
+        self.object_model_config = kwargs.get("object.model_config")
+        self.object_model_file = kwargs.get("object.model_file")
+
+        # Backend specific options are given as object.<model_type>.<option> (e.g. object.onnx.intra_op_threads)
+        option_prefix = f"object.{self.object_model_type}."
+        self.object_model_options = { k[len(option_prefix):]: v for k, v in kwargs.items() if k.startswith(option_prefix) }
+        self.object_label_file = kwargs.get("objects.label_file")
+        self.object_batch_size = kwargs.get("object.batch_size", 1)
+        self.object_classes = kwargs.get("object.classes")
+        self.model_labels = None
+        self.person_ids = None
+
+        self.face_detection = kwargs.get("face.detection", True)
+        self.face_recognition = kwargs.get("face.recognition", True)
+        self.face_tolerance = kwargs.get("face.tolerance", 0.5)
+        self.default_name = kwargs.get("face.default_name")
+        self.cache_folder = kwargs.get("face.cache_folder")
+        self.cache_compact_every = int(kwargs.get("face.cache.compact_every", 100))
+        self.face_cache = None
+        self.gallery_ann_threshold = int(kwargs.get("face.gallery.ann_threshold", 1000))
+        self.gallery_max_samples = int(kwargs.get("face.gallery.max_samples", 0))
+
+        # Precomputed encodings for face.entries and cached faces (defaults to the cache folder)
+        self.encoding_cache = kwargs.get("face.encoding_cache")
+        if self.encoding_cache is None and self.cache_folder is not None:
+            self.encoding_cache = os.path.join(os.path.expanduser(self.cache_folder), "encodings.npz")
+        self.encoding_store = None
+
+        # Cascade: detect objects only on motion (or a periodic keyframe) and faces only inside person boxes
+        self.cascade_enabled = kwargs.get("cascade.enabled", False)
+        self.cascade_keyframe = float(kwargs.get("cascade.keyframe", 5))
+        self.cascade_padding = float(kwargs.get("cascade.padding", 0.1))
+        self.cascade_stats = {}
+        self.stats_lock = threading.Lock()
+
+        # ROI: run the detector only on merged/padded motion regions instead of the full frame
+        self.roi_enabled = kwargs.get("roi.enabled", False)
+        self.roi_padding = float(kwargs.get("roi.padding", 0.2))
+        self.roi_min_size = int(kwargs.get("roi.min_size", 96))
+        self.roi_max_area = float(kwargs.get("roi.max_area", 0.6))
+
+        # Tracking: follow faces between frames and only re-run recognition for new or uncertain tracks
+        self.face_tracking = kwargs.get("face.tracking", False)
+        self.face_tracker_settings = {
+            "max_distance": kwargs.get("face.track.max_distance", 0.6),
+            "max_age": kwargs.get("face.track.max_age", 1.5),
+            "refresh": kwargs.get("face.track.refresh", 10),
+            "retry": kwargs.get("face.track.retry", 1.0),
+            "min_confidence": kwargs.get("face.track.min_confidence", 0.3)
+        }
+
+        # Process mode runs object detection and face location/encoding in worker processes fed from shared frame rings
+        self.execution_mode = str(kwargs.get("execution.mode", "thread")).lower().strip()
+        self.object_worker_count = max(1, int(kwargs.get("execution.object_workers", 1)))
+        self.face_worker_count = max(1, int(kwargs.get("execution.face_workers", 1)))
+
+        # Stages always take the newest frame; these cap how often each stage runs (0 = as fast as frames arrive)
+        self.obj_scheduler = StageScheduler(target_fps=kwargs.get("schedule.object_fps", 0))
+        self.face_scheduler = StageScheduler(target_fps=kwargs.get("schedule.face_fps", 0))
+
+        # Each entry in "cameras" overrides the top-level capture/record settings for that camera
+        self.cameras = {}
+        camera_list = kwargs.get("cameras")
+        if isinstance(camera_list, list) and len(camera_list) > 0:
+            for idx, entry in enumerate(camera_list):
+                if not isinstance(entry, dict):
+                    entry = { "video_device": entry }
+
+                camera_settings = dict(kwargs)
+                camera_settings.update(entry)
+                camera_settings["id"] = entry.get("id", f"camera{idx + 1}")
+                self.cameras[str(camera_settings["id"])] = Camera(self, **camera_settings)
+        else:
+            self.cameras[None] = Camera(self, **kwargs)
+
+        self.initialize_settings()
+
+    @property
+    def frames_per_second(self):
+        return max([x.frames_per_second for x in self.cameras.values() if x.frames_per_second is not None], default=None)
+
+    def _get_encoding(self, file_name):
+        if self.encoding_store is None:
+            return get_face_encoding(file_name)
+
+        return self.encoding_store.get(file_name, get_face_encoding)
+
+    def initialize_settings(self):
+        self.face_gallery = None
+
+        self.encoding_store = None
+        if self.encoding_cache is not None:
+            self.encoding_store = EncodingStore(self.encoding_cache)
+
+        for camera in self.cameras.values():
+            camera.initialize()
+
+        if self.settings.get("face.entries") is not None:
+            self.face_gallery = FaceGallery(ann_threshold=self.gallery_ann_threshold)
+            for face_name in self.settings.get("face.entries", {}):
+                image_list = self.settings.get("face.entries", {}).get(face_name)
+                if isinstance(image_list, list):
+                    for img in image_list:
+                        self.face_gallery.add(face_name, self._get_encoding(img))
+                else:
+                    self.face_gallery.add(face_name, self._get_encoding(image_list))
+
+        if self.face_cache is not None:
+            self.face_cache.close()
+            self.face_cache = None
+
+        if self.cache_folder is not None:
+            cache_folder = os.path.expanduser(self.cache_folder)
+            self.face_cache = FaceCache(cache_folder, default_name=self.default_name if self.default_name is not None else "Unknown", 
+                                        compact_every=self.cache_compact_every)
+
+            if len(self.face_cache.entries) > 0:
+
+                if self.face_gallery is None:
+                    self.face_gallery = FaceGallery(ann_threshold=self.gallery_ann_threshold)
+
+                data = self.face_cache.entries
+                for face_name in list(data):
+                    try:
+                        img = os.path.join(cache_folder, data[face_name])
+                        self.face_gallery.add(face_name, self._get_encoding(img))
+                    except Exception:
+                        pass
+
+        if self.encoding_store is not None:
+            self.encoding_store.save(prune=True)
+            self.logger.debug(f"Face encodings: {self.encoding_store.stats['hits']} cached, {self.encoding_store.stats['encoded']} encoded")
+
+        if self.face_gallery is not None and self.gallery_max_samples > 0:
+            removed = self.face_gallery.compact(max_samples=self.gallery_max_samples)
+            self.logger.debug(f"Compacted face gallery ({removed} encodings merged)")
+
+    def object_window(self):
+        # With fewer cameras than the batch size each camera keeps a few frames waiting so the batch can still fill
+        cameras = max(1, len(self.cameras))
+        return max(1, int(math.ceil(max(1, int(self.object_batch_size)) / float(cameras))))
+
+    def frames_in_flight(self):
+        # Frames a camera can have waiting in (or held by) the object and face stages at once
+        return 2 + self.object_window() + max(1, len(self.face_workers))
+
+    def _start_workers(self):
+        self.object_workers = []
+        self.face_workers = []
+
+        if self.execution_mode != "process":
+            return
+
+        if self.object_detection or self.face_detection:
+            settings = {
+                "model_type": self.object_model_type,
+                "model_config": self.object_model_config,
+                "model_file": self.object_model_file,
+                "options": self.object_model_options,
+                "classes": self.get_object_classes(),
+                "label_file": self.object_label_file,
+                "threshold": self.object_threshold,
+                "batch_size": self.object_batch_size
+            }
+
+            for idx in range(self.object_worker_count):
+                self.object_workers.append(StageWorker("object", settings))
+
+        if self.face_detection and self.face_recognition:
+            for idx in range(self.face_worker_count):
+                self.face_workers.append(StageWorker("face"))
+
+        for worker in self.object_workers + self.face_workers:
+            worker.start()
+
+        self.logger.debug(f"Started {len(self.object_workers)} object and {len(self.face_workers)} face worker processes")
+
+    def _process_motion_and_objects(self):
+        self.logger.debug("Starting object and motion detection thread")
+
+        # The model is loaded once here and its detections are shared with the face thread
+        run_objects = self.object_detection or self.face_detection
+
+        model = None
+        if run_objects and len(self.object_workers) == 0:
+            model = object_model(model_type=self.object_model_type, model_config=self.object_model_config, model_file=self.object_model_file,
+                                 batch_size=self.object_batch_size, options=self.object_model_options)
+
+        self.logger.debug("Object and motion detection thread started")
+
+        batch_size = max(1, int(self.object_batch_size))
+
+        while True:
+            self.obj_scheduler.wait(self.stop_event)
+            if self.stop_event.is_set():
+                break
+
+            # The newest frames from the waiting cameras (up to the batch size) share a single forward pass
+            batch = self.obj_slot.get(max_items=batch_size)
+            if batch is None:
+                break
+
+            start = time.time()
+
+            # Motion
+            batch_movements = []
+            for item in batch:
+                movements = None
+                if self.motion_enabled:
+                    camera = self.cameras[item.camera]
+
+                    # The blurred gray frame is a new array that motion_detection only reads, so it is kept as-is
+                    image = image_blur(image_gray(item.frame))
+                    movements = motion_detection(image=image, last_image=camera.last_image, threshold=self.motion_threshold, motion_area=self.motion_area)
+                    camera.last_image = image
+
+                batch_movements.append(movements)
+
+            # Object
+            batch_detected = [None] * len(batch)
+            if run_objects:
+                selected = []
+                for idx, item in enumerate(batch):
+                    camera = self.cameras[item.camera]
+                    if not self.cascade_enabled or not self.motion_enabled or batch_movements[idx]:
+                        selected.append(idx)
+                    elif item.timestamp - camera.last_detection >= self.cascade_keyframe:
+                        self._count("keyframes")
+                        selected.append(idx)
+
+                # Each job is (batch index, image, left offset, top offset)
+                jobs = []
+                for idx in selected:
+                    frame = batch[idx].frame
+                    height, width = frame.shape[:2]
+                    self._count("pixels", width * height)
+                    batch_detected[idx] = [make_detections()]
+
+                    regions = None
+                    if self.roi_enabled and batch_movements[idx]:
+                        regions = merge_regions(get_regions(batch_movements[idx], width, height, padding=self.roi_padding, min_size=self.roi_min_size))
+                        if sum([(x[2] - x[0]) * (x[3] - x[1]) for x in regions]) > width * height * self.roi_max_area:
+                            regions = None
+
+                    if regions is None:
+                        jobs.append((idx, None, 0, 0))
+                        self._count("analyzed_pixels", width * height)
+                    else:
+                        for (left, top, right, bottom) in regions:
+                            jobs.append((idx, (left, top, right, bottom), left, top))
+                            self._count("analyzed_pixels", (right - left) * (bottom - top))
+
+                if len(jobs) > 0:
+                    results = self._detect_objects(batch, jobs, model)
+                    for job, detected in zip(jobs, results):
+                        batch_detected[job[0]].append(offset_detections(detected, left=job[2], top=job[3]))
+
+                batch_detected = [np.concatenate(x) if x is not None else None for x in batch_detected]
+
+            self.obj_scheduler.end(start, frames=len(batch))
+
+            for item, movements, detected in zip(batch, batch_movements, batch_detected):
+                camera = self.cameras[item.camera]
+
+                self._count("frames")
+                if movements:
+                    self._count("motion")
+
+                if detected is not None:
+                    self._count("objects")
+                    if self._has_person(detected):
+                        self._count("persons")
+
+                    camera.last_detection = item.timestamp
+                    camera.last_objects = detected
+
+                objects = None
+                if self.object_detection:
+                    # Frames skipped by the cascade keep the last detections since nothing changed in view
+                    objects = detected if detected is not None else camera.last_objects
+
+                ret = []
+                if movements is not None:
+                    ret.extend(movements)
+
+                curr_time = item.timestamp
+
+                if self.face_detection and detected is not None:
+                    item.objects = detected
+                    self.face_slot.put(item.camera, item.retain())
+
+                camera.update_recording(self._has_person(objects), curr_time)
+
+                for entry in ret:
+                    entry["timestamp"] = curr_time
+
+                # Detections stay as arrays until the callback thread reports them
+                self.callback_queue.put({ "camera": item.camera, "items": ret, "detections": objects, "timestamp": curr_time })
+                item.release()
+
+    def get_object_classes(self):
+        if self.object_classes is None:
+            return None
+
+        # Recording and face detection are driven by person detections so they are never filtered out
+        classes = [self.object_classes] if isinstance(self.object_classes, str) else list(self.object_classes)
+        if "person" not in classes and (self.face_detection or any([x.record_enabled for x in self.cameras.values()])):
+            classes.append("person")
+
+        return classes
+
+    def _has_person(self, detections):
+        return detections is not None and len(detections) > 0 and bool(np.isin(detections["class_id"], self.person_ids).any())
+
+    def _detect_objects(self, batch, jobs, model):
+        # Each job is (batch index, crop box or None for the full frame, left offset, top offset)
+        if len(self.object_workers) == 0:
+            images = []
+            for idx, box, left, top in jobs:
+                frame = batch[idx].frame
+                images.append(frame if box is None else frame[box[1]:box[3], box[0]:box[2]])
+
+            return object_detection_batch(images=images, model=model, labels=self.model_labels, threshold=self.object_threshold,
+                                          classes=self.get_object_classes(), structured=True)
+
+        workers = [x for x in self.object_workers if not x.failed]
+        results = [make_detections() for x in jobs]
+        if len(workers) == 0:
+            return results
+
+        # Jobs are split into one chunk per worker and all chunks are sent before waiting so the workers run concurrently
+        chunk_size = int(math.ceil(len(jobs) / float(len(workers))))
+        sent = []
+        for worker, start in zip(workers, range(0, len(jobs), chunk_size)):
+            chunk = list(range(start, min(start + chunk_size, len(jobs))))
+            if worker.send({ "frames": [frame_ref(batch[jobs[x][0]], box=jobs[x][1]) for x in chunk] }):
+                sent.append((worker, chunk))
+
+        for worker, chunk in sent:
+            detected = worker.receive()
+            if detected is not None:
+                for job_idx, items in zip(chunk, detected):
+                    results[job_idx] = items
+
+        return results
+
+    def _process_faces(self, worker=None):
+        self.logger.debug("Starting face detection thread")
+
+        self.logger.debug("Face detection thread started")
+
+        while True:
+            self.face_scheduler.wait(self.stop_event)
+            if self.stop_event.is_set():
+                break
+
+            items = self.face_slot.get(max_items=1)
+            if items is None:
+                break
+
+            data = items[0]
+            start = time.time()
+
+            faces = []
+            hasFace = False
+            width_calc = 100000
+            persons = None
+            if data.objects is not None:
+                persons = data.objects[np.isin(data.objects["class_id"], self.person_ids)]
+                if len(persons) > 0:
+                    hasFace = True
+                    width_calc = int((persons["right"] - persons["left"]).min())
+
+            if hasFace and self.face_recognition:
+                image = data.frame
+
+                scale = 1.0
+                if width_calc > 1000:
+                    scale = 0.2
+                elif width_calc > 600:
+                    scale = 0.3
+                elif width_calc > 300:
+                    scale = 0.5
+                elif width_calc > 200:
+                    scale = 0.7
+
+                image = image_resize(image, scale)
+
+                regions = None
+                if self.cascade_enabled or self.roi_enabled:
+                    regions = get_regions(persons, image.shape[1], image.shape[0], 
+                                          padding=self.cascade_padding, scale=scale)
+
+                found = None
+                if worker is not None:
+                    # Locations and encodings come from the worker; matching stays here with the shared gallery
+                    found = worker.request({ "frame": frame_ref(data), "scale": scale, "regions": regions, "encode": self.face_gallery is not None })
+                    if found is None:
+                        found = ([], [])
+
+                with self.face_lock:
+                    if self.face_tracking:
+                        ret = self._track_faces(image, scale, regions, self.cameras[data.camera].face_tracker, data.timestamp, found=found)
+                    else:
+                        ret = face_detection(image=image, gallery=self.face_gallery,
+                                             tolerance=self.face_tolerance,
+                                             default_name=self.default_name,
+                                             cache_folder=self.cache_folder, face_cache=self.face_cache,
+                                             regions=regions, found_locations=found[0] if found is not None else None,
+                                             found_encodings=found[1] if found is not None else None)
+                        self._count("recognitions", len(ret))
+
+                faces.extend(ret)
+
+                self._count("face_runs")
+                if len(ret) > 0:
+                    self._count("face_hits")
+
+                self.face_scheduler.end(start)
+
+                for item in faces:
+                    item["timestamp"] = data.timestamp
+
+                self.callback_queue.put({ "camera": data.camera, "items": faces })
+
+            data.release()
+
+    def _track_faces(self, image, scale, regions, tracker, timestamp, found=None):
+        default_name = self.default_name if self.default_name is not None else "Unknown"
+
+        locations = found[0] if found is not None else get_face_locations(image, regions=regions)
+        if locations is None or len(locations) == 0:
+            return []
+
+        # Tracks are kept in full-frame coordinates since the face image scale changes between frames
+        tracks = tracker.update([tuple([x / scale for x in loc]) for loc in locations], timestamp)
+
+        pending = [idx for idx in range(len(tracks)) if tracker.needs_recognition(tracks[idx], timestamp)]
+        if len(pending) > 0:
+            if self.face_gallery is not None:
+                names, distances = recognize_faces(image, [locations[idx] for idx in pending], gallery=self.face_gallery, 
+                                                   tolerance=self.face_tolerance, default_name=default_name, 
+                                                   cache_folder=self.cache_folder, face_cache=self.face_cache, 
+                                                   found_encodings=[found[1][idx] for idx in pending] if found is not None else None)
+            else:
+                names = [default_name] * len(pending)
+                distances = [None] * len(pending)
+
+            for idx, name, distance in zip(pending, names, distances):
+                tracker.set_identity(tracks[idx], name, distance, self.face_tolerance, timestamp)
+
+            self._count("recognitions", len(pending))
+
+        self._count("tracked", len(tracks) - len(pending))
+
+        return [tracker.get_face(x) for x in tracks]
+
+    def _process_callback(self):
+        # Notification state is tracked per camera so one camera's changes don't mask another's
+        state = {}
+
+        while True:
+            data = self.callback_queue.get()
+            if data is None or not isinstance(data, dict) or not isinstance(data.get("items"), list):
+                break
+
+            camera_id = data.get("camera")
+            cam_state = state.setdefault(camera_id, {
+                "motion": False,
+                "last_motion": 0,
+                "faces": {},
+                "last_motion_notify": False,
+                "last_object_list": []
+            })
+
+            is_face_notice = False
+            detections = data.get("detections")
+            for item in data.get("items"):
+                if item.get("type") == "movement":
+                    cam_state["motion"] = True
+                    cam_state["last_motion"] = item.get("timestamp")
+                elif item.get("type") == "face":
+                    cam_state["faces"][item.get("name", "Unknown")] = item
+                    is_face_notice = True
+
+            if cam_state["motion"] and (time.time() - 1) > cam_state["last_motion"]:
+                cam_state["motion"] = False
+
+            if not is_face_notice:
+                object_list = sorted(detection_names(detections, self.model_labels), key=str) if detections is not None else []
+                if cam_state["motion"] != cam_state["last_motion_notify"] or object_list != cam_state["last_object_list"]:
+                    context = None
+                    if camera_id is not None:
+                        context = self.service.get_local_context()
+                        context.camera = camera_id
+
+                    self.service.collect(data={
+                        "type": "kenzy.image",
+                        "motion": cam_state["motion"],
+                        "objects": detections_to_objects(detections, self.model_labels, timestamp=data.get("timestamp")),
+                        "faces": cam_state["faces"]
+                    }, context=context, wait=False)
+
+                    cam_state["last_motion_notify"] = cam_state["motion"]
+                    cam_state["last_object_list"] = object_list
+
+            self.callback_queue.task_done()
+
     @property
     def accepts(self):
         return ["start", "stop", "restart", "snapshot", "stream", "status", "get_settings", "set_settings"]
@@ -476,45 +877,57 @@ class VideoProcessor:
 
     def get_settings(self, **kwargs):
         return KenzyErrorResponse("Not Implemented")
-    
+
     def set_settings(self, **kwargs):
         return KenzyErrorResponse("Not implemented")
 
+    def _threads_alive(self):
+        return (self.obj_thread is not None and self.obj_thread.is_alive()) \
+            or any([x.is_alive() for x in self.face_threads]) \
+            or (self.callback_thread is not None and self.callback_thread.is_alive()) \
+            or any([x.is_alive() for x in self.cameras.values()])
+
     def start(self, **kwargs):
         self.restart_enabled = False
         if self.is_alive():
             self.logger.error("Video Processor already running")
             return KenzyErrorResponse("Video Processor already running")
 
-        # Insure we're good to start without already running routines       
-        if (self.main_thread is not None and self.main_thread.is_alive()) \
-                or (self.obj_thread is not None and self.obj_thread.is_alive()) \
-                or (self.face_thread is not None and self.face_thread.is_alive()) \
-                or (self.rec_thread is not None and self.rec_thread.is_alive()) \
-                or (self.callback_thread is not None and self.callback_thread.is_alive()):
-
+        # Insure we're good to start without already running routines
+        if self._threads_alive():
             self.stop()
-        
-        self.frame_buffer.clear()
-        
-        self.obj_queue = queue.Queue(1)  # int(self.frame_buffer_size * self.frames_per_second))
+
+        self.stop_event.clear()
+        self.cascade_stats = { "frames": 0, "motion": 0, "keyframes": 0, "objects": 0, "persons": 0, "face_runs": 0, "face_hits": 0, 
+                               "pixels": 0, "analyzed_pixels": 0, "recognitions": 0, "tracked": 0 }
+
+        for camera in self.cameras.values():
+            camera.face_tracker = FaceTracker(**self.face_tracker_settings) if self.face_tracking else None
+
+        self.model_labels = object_labels(label_file=self.object_label_file, model_type=self.object_model_type)
+        self.person_ids = class_filter(self.model_labels, ["person"])
+
+        self._start_workers()
+
+        self.obj_slot.open(depth=self.object_window())
+        self.obj_scheduler.reset()
         self.obj_thread = threading.Thread(target=self._process_motion_and_objects, daemon=True)
         self.obj_thread.start()
 
-        self.face_queue = queue.Queue(1)  # int(self.frame_buffer_size * self.frames_per_second))
-        self.face_thread = threading.Thread(target=self._process_faces, daemon=True)
-        self.face_thread.start()
-
-        self.rec_queue = queue.Queue()  # int(self.frame_buffer_size * self.frames_per_second))
-        self.rec_thread = threading.Thread(target=self._process_record, daemon=True)
-        self.rec_thread.start()
+        self.face_slot.open()
+        self.face_scheduler.reset()
+        self.face_threads = []
+        for worker in (self.face_workers if len(self.face_workers) > 0 else [None]):
+            face_thread = threading.Thread(target=self._process_faces, args=(worker,), daemon=True)
+            face_thread.start()
+            self.face_threads.append(face_thread)
 
         self.callback_queue = queue.Queue()
         self.callback_thread = threading.Thread(target=self._process_callback, daemon=True)
         self.callback_thread.start()
 
-        self.main_thread = threading.Thread(target=self._read_from_device, daemon=True)
-        self.main_thread.start()
+        for camera in self.cameras.values():
+            camera.start()
 
         if self.is_alive():
             self.logger.info("Started Video Processor")
@@ -524,70 +937,103 @@ class VideoProcessor:
             return KenzyErrorResponse("Unable to start Video Processor")
 
     def stop(self, **kwargs):
-        if (self.main_thread is None or not self.main_thread.is_alive()) \
-                and (self.obj_thread is None or not self.obj_thread.is_alive()) \
-                and (self.face_thread is None or not self.face_thread.is_alive()) \
-                and (self.rec_thread is None or not self.rec_thread.is_alive()) \
-                and (self.callback_thread is None or not self.callback_thread.is_alive()):
-
+        if not self._threads_alive():
             self.logger.error("Video Processor is not running")
             return KenzyErrorResponse("Video Processor is not running")
-        
-        self.record_event.clear()
+
         self.stop_event.set()
-        
-        if self.main_thread.is_alive():
-            self.main_thread.join()
 
+        for camera in self.cameras.values():
+            camera.stop()
+
+        self.obj_slot.close()
         if self.obj_thread.is_alive():
-            self.obj_queue.put(None)
             self.obj_thread.join()
 
-        if self.face_thread.is_alive():
-            self.face_queue.put(None)
-            self.face_thread.join()
+        self.face_slot.close()
+        for face_thread in self.face_threads:
+            face_thread.join()
 
-        if self.rec_thread.is_alive():
-            self.rec_queue.put(None)
-            self.rec_thread.join()
+        for worker in self.object_workers + self.face_workers:
+            worker.stop()
+
+        self.object_workers = []
+        self.face_workers = []
 
         if self.callback_thread.is_alive():
             self.callback_queue.put(None)
             self.callback_thread.join()
 
+        for camera in self.cameras.values():
+            camera.release_frames()
+
+        if self.face_cache is not None:
+            self.face_cache.close()
+
         if not self.is_alive():
             self.logger.info("Stopped Video Processor")
             return KenzySuccessResponse("Stopped Video Processor")
         else:
             self.logger.error("Unable to stop Video Processor")
             return KenzyErrorResponse("Unable to stop Video Processor")
-    
+
     def restart(self, **kwargs):
         self.restart_enabled = False
-        if (self.main_thread is not None and self.main_thread.is_alive()) \
-                or (self.obj_thread is not None and self.obj_thread.is_alive()) \
-                or (self.face_thread is not None and self.face_thread.is_alive()) \
-                or (self.rec_thread is not None and self.rec_thread.is_alive()) \
-                or (self.callback_thread is not None and self.callback_thread.is_alive()):
-            
+        if self._threads_alive():
             ret = self.stop()
             if not ret.is_success():
                 print(ret.get())
                 return ret
-        
+
         return self.start()
 
     def is_alive(self, **kwargs):
-        if self.main_thread is not None and self.main_thread.is_alive():
-            return True
-        
+        for camera in self.cameras.values():
+            if camera.read_thread is not None and camera.read_thread.is_alive():
+                return True
+
         return False
 
     def snapshot(self, **kwargs):
         return KenzyErrorResponse("Not implemented")
 
+    def _count(self, name, value=1):
+        # The object thread and every face thread update the counters
+        with self.stats_lock:
+            self.cascade_stats[name] += value
+
+    def get_cascade_stats(self):
+        with self.stats_lock:
+            stats = dict(self.cascade_stats)
+
+        if len(stats) == 0:
+            return stats
+
+        def rate(hits, total):
+            return round(float(hits) / total, 4) if total > 0 else 0.0
+
+        # Each stage's hit rate is relative to the frames that reached that stage
+        stats["enabled"] = bool(self.cascade_enabled)
+        stats["motion_rate"] = rate(stats["motion"], stats["frames"])
+        stats["object_rate"] = rate(stats["objects"], stats["frames"])
+        stats["person_rate"] = rate(stats["persons"], stats["objects"])
+        stats["face_rate"] = rate(stats["face_hits"], stats["face_runs"])
+        stats["pixel_rate"] = rate(stats["analyzed_pixels"], stats["pixels"])
+
+        return stats
+
+    def get_schedule_stats(self):
+        return {
+            "object": self.obj_scheduler.get_stats(dropped=self.obj_slot.dropped),
+            "face": self.face_scheduler.get_stats(dropped=self.face_slot.dropped)
+        }
+
     def status(self, **kwargs):
-        return KenzySuccessResponse(get_status(self))
-    
+        ret = get_status(self)
+        ret["data"]["cascade"] = self.get_cascade_stats()
+        ret["data"]["schedule"] = self.get_schedule_stats()
+        ret["data"]["preroll"] = { str(x): y.preroll.get_stats() for x, y in self.cameras.items() if y.preroll is not None }
+        return KenzySuccessResponse(ret)
+
     def stream(self, **kwargs):
-        return KenzyErrorResponse("Not implemented")
\ No newline at end of file
+        return KenzyErrorResponse("Not implemented")
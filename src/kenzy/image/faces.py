@@ -0,0 +1,554 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import queue
+import re
+import threading
+import uuid
+import numpy as np
+import kenzy.settings
+
+try:
+    import hnswlib
+except ModuleNotFoundError:
+    hnswlib = None
+
+
+class FaceTracker:
+    """
+    Centroid tracker that follows faces between frames so recognition only runs when a track is new or uncertain.
+
+    Args:
+        max_distance (float): Maximum centroid movement between frames as a fraction of the face width.
+        max_age (float): Seconds a track is kept without a matching face.
+        refresh (float): Seconds between re-recognition of confident tracks.
+        retry (float): Seconds between re-recognition of low-confidence tracks.
+        min_confidence (float): Confidence below which a track is considered uncertain.
+    """
+
+    def __init__(self, max_distance=0.6, max_age=1.5, refresh=10, retry=1.0, min_confidence=0.3):
+        self.max_distance = float(max_distance)
+        self.max_age = float(max_age)
+        self.refresh = float(refresh)
+        self.retry = float(retry)
+        self.min_confidence = float(min_confidence)
+        self.tracks = {}
+        self.next_id = 1
+
+    @staticmethod
+    def _centroid(location):
+        (top, right, bottom, left) = location
+        return ((left + right) / 2.0, (top + bottom) / 2.0)
+
+    def update(self, locations, timestamp):
+        """
+        Matches face locations to existing tracks (greedy nearest centroid) and creates tracks for new faces.
+
+        Args:
+            locations (list): Face locations as (top, right, bottom, left) tuples.
+            timestamp (float): Time of the frame.
+
+        Returns:
+            (list):  Track dictionaries in the same order as locations.
+        """
+
+        for track_id in [x for x in self.tracks if timestamp - self.tracks[x]["last_seen"] > self.max_age]:
+            self.tracks.pop(track_id)
+
+        candidates = []
+        for idx, location in enumerate(locations):
+            cx, cy = self._centroid(location)
+            for track_id, track in self.tracks.items():
+                tx, ty = self._centroid(track["location"])
+                width = max(1, track["location"][1] - track["location"][3])
+                distance = math.hypot(cx - tx, cy - ty) / width
+                if distance <= self.max_distance:
+                    candidates.append((distance, idx, track_id))
+
+        candidates.sort()
+
+        ret = [None] * len(locations)
+        used = set()
+        for distance, idx, track_id in candidates:
+            if ret[idx] is not None or track_id in used:
+                continue
+
+            ret[idx] = self.tracks[track_id]
+            used.add(track_id)
+
+        for idx, location in enumerate(locations):
+            if ret[idx] is None:
+                ret[idx] = {
+                    "id": self.next_id,
+                    "name": None,
+                    "distance": None,
+                    "confidence": 0.0,
+                    "recognized": None,
+                    "created": timestamp
+                }
+                self.tracks[self.next_id] = ret[idx]
+                self.next_id += 1
+
+            ret[idx]["location"] = tuple(location)
+            ret[idx]["last_seen"] = timestamp
+
+        return ret
+
+    def needs_recognition(self, track, timestamp):
+        if track.get("recognized") is None:
+            return True
+
+        interval = self.refresh if track.get("confidence", 0.0) >= self.min_confidence else self.retry
+        return timestamp - track.get("recognized") >= interval
+
+    def set_identity(self, track, name, distance, tolerance, timestamp):
+        track["name"] = name
+        track["distance"] = distance
+        track["confidence"] = max(0.0, 1.0 - (float(distance) / tolerance)) if distance is not None and tolerance > 0 else 0.0
+        track["recognized"] = timestamp
+
+    @staticmethod
+    def get_face(track):
+        (top, right, bottom, left) = track["location"]
+        return {
+            "type": "face",
+            "confidence": 1.0,
+            "distance": track.get("distance"),
+            "name": track.get("name"),
+            "track_id": track.get("id"),
+            "location": {
+                "left": int(left),
+                "top": int(top),
+                "right": int(right),
+                "bottom": int(bottom)
+            }
+        }
+
+
+class FaceGallery:
+    """
+    Known face encodings stored in one contiguous matrix with precomputed squared norms so every face in a frame
+    is matched with a single matrix product.  An approximate nearest-neighbor index (hnswlib, if installed) is used
+    once the gallery grows past ann_threshold entries.
+
+    Args:
+        dim (int): Encoding dimensions.
+        ann_threshold (int): Number of entries at which the ANN index is used (0 to disable).
+    """
+
+    logger = logging.getLogger("FACE-GALLERY")
+
+    def __init__(self, dim=128, ann_threshold=1000):
+        self.dim = int(dim)
+        self.ann_threshold = int(ann_threshold)
+        self.lock = threading.RLock()
+        self.names = []
+        self.matrix = np.zeros((64, self.dim), dtype=np.float64)
+        self.sq_norms = np.zeros(64, dtype=np.float64)
+        self.size = 0
+        self.index = None
+
+        if self.ann_threshold > 0 and hnswlib is None:
+            self.logger.debug("hnswlib not installed; using exact search only")
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, count):
+        if count <= self.matrix.shape[0]:
+            return
+
+        capacity = self.matrix.shape[0]
+        while capacity < count:
+            capacity *= 2
+
+        matrix = np.zeros((capacity, self.dim), dtype=np.float64)
+        matrix[:self.size] = self.matrix[:self.size]
+        sq_norms = np.zeros(capacity, dtype=np.float64)
+        sq_norms[:self.size] = self.sq_norms[:self.size]
+
+        self.matrix = matrix
+        self.sq_norms = sq_norms
+
+    def add(self, name, encoding):
+        self.add_many([name], [encoding])
+
+    def add_many(self, names, encodings):
+        if len(names) == 0:
+            return
+
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, self.dim)
+
+        with self.lock:
+            start = self.size
+            self._reserve(start + len(names))
+
+            self.matrix[start:start + len(names)] = encodings
+            self.sq_norms[start:start + len(names)] = np.einsum("ij,ij->i", encodings, encodings)
+            self.names.extend(names)
+            self.size += len(names)
+
+            if self.index is not None:
+                if self.size > self.index.get_max_elements():
+                    self.index.resize_index(self.matrix.shape[0])
+                self.index.add_items(encodings, np.arange(start, self.size))
+
+    def _use_index(self):
+        if hnswlib is None or self.ann_threshold <= 0 or self.size < self.ann_threshold:
+            return False
+
+        if self.index is None:
+            self.index = hnswlib.Index(space="l2", dim=self.dim)
+            self.index.init_index(max_elements=self.matrix.shape[0], ef_construction=200, M=16)
+            self.index.add_items(self.matrix[:self.size], np.arange(self.size))
+            self.index.set_ef(100)
+
+        return True
+
+    def search(self, encodings):
+        """
+        Finds the nearest known face for each encoding.
+
+        Args:
+            encodings (list): Face encodings to look up.
+
+        Returns:
+            (tuple):  Arrays of best matching indexes and their Euclidean distances (index -1 if the gallery is empty).
+        """
+
+        query = np.asarray(encodings, dtype=np.float64).reshape(-1, self.dim)
+
+        with self.lock:
+            if self.size == 0 or len(query) == 0:
+                return np.full(len(query), -1, dtype=np.int64), np.full(len(query), np.inf)
+
+            if self._use_index():
+                # Re-rank a few ANN candidates with exact distances
+                labels, sq_dist = self.index.knn_query(query, k=min(8, self.size))
+                labels = labels.astype(np.int64)
+                candidates = self.matrix[labels] - query[:, None, :]
+                sq_dist = np.einsum("ijk,ijk->ij", candidates, candidates)
+
+                best = np.argmin(sq_dist, axis=1)
+                rows = np.arange(len(query))
+                return labels[rows, best], np.sqrt(sq_dist[rows, best])
+
+            # |a - b|^2 = |a|^2 + |b|^2 - 2ab
+            sq_dist = np.einsum("ij,ij->i", query, query)[:, None] + self.sq_norms[None, :self.size] \
+                - 2.0 * (query @ self.matrix[:self.size].T)
+
+            best = np.argmin(sq_dist, axis=1)
+            return best, np.sqrt(np.maximum(sq_dist[np.arange(len(query)), best], 0.0))
+
+    def get_name(self, idx):
+        return self.names[idx] if 0 <= idx < self.size else None
+
+    def compact(self, max_samples=1):
+        """
+        Replaces the samples of identities with more than max_samples encodings by their centroid.
+        """
+
+        with self.lock:
+            groups = {}
+            for idx, name in enumerate(self.names):
+                groups.setdefault(name, []).append(idx)
+
+            names = []
+            encodings = []
+            for name, idxs in groups.items():
+                if len(idxs) > max_samples:
+                    names.append(name)
+                    encodings.append(self.matrix[idxs].mean(axis=0))
+                else:
+                    names.extend([name] * len(idxs))
+                    encodings.extend(self.matrix[idxs])
+
+            removed = self.size - len(names)
+
+            self.names = []
+            self.size = 0
+            self.index = None
+            self.add_many(names, encodings)
+
+        return removed
+
+    def save(self, file_name):
+        with self.lock:
+            np.savez(file_name, names=np.array(self.names, dtype=str), encodings=self.matrix[:self.size])
+
+    def load(self, file_name):
+        with np.load(file_name, allow_pickle=False) as data:
+            names = [str(x) for x in data["names"]]
+            encodings = data["encodings"]
+
+        with self.lock:
+            self.names = []
+            self.size = 0
+            self.index = None
+            self.add_many(names, encodings)
+
+
+class EncodingStore:
+    """
+    Persistent cache of face encodings keyed by image path.  Entries are reused while the file's modification time
+    and size are unchanged (or its content hash still matches) so only new or changed images are encoded.
+
+    Args:
+        file_name (str): Path of the .npz file backing the store.
+        dim (int): Encoding dimensions.
+    """
+
+    logger = logging.getLogger("FACE-STORE")
+
+    def __init__(self, file_name, dim=128):
+        self.file_name = os.path.expanduser(file_name)
+        self.dim = int(dim)
+        self.entries = {}
+        self.used = set()
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.stats = { "hits": 0, "encoded": 0 }
+
+        self.load()
+
+    @staticmethod
+    def get_hash(file_name):
+        sha = hashlib.sha1()
+        with open(file_name, "rb") as fp:
+            for chunk in iter(lambda: fp.read(65536), b""):
+                sha.update(chunk)
+
+        return sha.hexdigest()
+
+    def load(self):
+        if not os.path.isfile(self.file_name):
+            return
+
+        try:
+            with np.load(self.file_name, allow_pickle=False) as data:
+                for path, mtime, size, file_hash, encoding in zip(data["paths"], data["mtimes"], data["sizes"], data["hashes"], data["encodings"]):
+                    self.entries[str(path)] = { "mtime": float(mtime), "size": int(size), "hash": str(file_hash), "encoding": encoding }
+
+        except (OSError, ValueError, KeyError):
+            self.logger.warning(f"Unable to read encoding store {self.file_name}; rebuilding")
+            self.entries = {}
+
+    def get(self, file_name, loader):
+        """
+        Returns the encoding for an image, calling loader(file_name) only if the image is new or has changed.
+        """
+
+        path = os.path.abspath(os.path.expanduser(file_name))
+        stat = os.stat(path)
+
+        with self.lock:
+            self.used.add(path)
+            entry = self.entries.get(path)
+
+        if entry is not None and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            self.stats["hits"] += 1
+            return entry["encoding"]
+
+        file_hash = self.get_hash(path)
+        if entry is not None and entry["hash"] == file_hash:
+            encoding = entry["encoding"]
+            self.stats["hits"] += 1
+        else:
+            encoding = np.asarray(loader(path), dtype=np.float64)
+            self.stats["encoded"] += 1
+
+        with self.lock:
+            self.entries[path] = { "mtime": stat.st_mtime, "size": stat.st_size, "hash": file_hash, "encoding": encoding }
+            self.dirty = True
+
+        return encoding
+
+    def save(self, prune=False):
+        """
+        Writes the store if it changed.  With prune, entries not requested since it was loaded are dropped.
+        """
+
+        with self.lock:
+            if prune:
+                for path in [x for x in self.entries if x not in self.used]:
+                    self.entries.pop(path)
+                    self.dirty = True
+
+            if not self.dirty:
+                return
+
+            paths = list(self.entries.keys())
+            data = {
+                "paths": np.array(paths, dtype=str),
+                "mtimes": np.array([self.entries[x]["mtime"] for x in paths], dtype=np.float64),
+                "sizes": np.array([self.entries[x]["size"] for x in paths], dtype=np.int64),
+                "hashes": np.array([self.entries[x]["hash"] for x in paths], dtype=str),
+                "encodings": np.array([self.entries[x]["encoding"] for x in paths], dtype=np.float64).reshape(-1, self.dim)
+            }
+
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.file_name)), exist_ok=True)
+
+                # Write to a temporary file first so a crash never leaves a truncated store behind
+                tmp_file = self.file_name + ".tmp.npz"
+                np.savez(tmp_file, **data)
+                os.replace(tmp_file, self.file_name)
+                self.dirty = False
+
+            except OSError:
+                self.logger.warning(f"Unable to save encoding store {self.file_name}")
+
+
+class FaceCache:
+    """
+    Index of unknown faces saved to the cache folder.  New faces are named from an in-memory counter and appended to
+    a journal by a background writer; the journal is periodically compacted into cache.yml.
+
+    Args:
+        cache_folder (str): Folder holding the face images, cache.yml and the journal.
+        default_name (str): Prefix for the sequential names of new faces.
+        compact_every (int): Journal entries written before they are compacted into cache.yml.
+    """
+
+    logger = logging.getLogger("FACE-CACHE")
+
+    def __init__(self, cache_folder, default_name="Unknown", compact_every=100):
+        self.cache_folder = os.path.expanduser(cache_folder)
+        self.default_name = default_name
+        self.compact_every = max(1, int(compact_every))
+        self.index_file = os.path.join(self.cache_folder, "cache.yml")
+        self.journal_file = os.path.join(self.cache_folder, "cache.journal")
+
+        self.entries = {}
+        self.pending = set()
+        self.journal_size = 0
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.write_queue = queue.Queue()
+        self.thread = None
+
+        self.load()
+
+    def load(self):
+        try:
+            self.entries = kenzy.settings.load(self.index_file) if os.path.isfile(self.index_file) else {}
+        except Exception:
+            self.logger.error(f"Unable to read {self.index_file}")
+            self.entries = {}
+
+        if not isinstance(self.entries, dict):
+            self.entries = {}
+
+        # Replay faces written since the last compaction
+        self.journal_size = 0
+        if os.path.isfile(self.journal_file):
+            with open(self.journal_file, "r", encoding="UTF-8") as fp:
+                for line in fp:
+                    try:
+                        item = json.loads(line)
+                        self.entries[item["name"]] = item["file"]
+                        self.journal_size += 1
+                    except (ValueError, KeyError, TypeError):
+                        pass  # Partial line from an interrupted write
+
+        pattern = re.compile("^" + re.escape(str(self.default_name)) + "-([0-9]+)$")
+        for face_name in self.entries:
+            match = pattern.match(str(face_name))
+            if match is not None:
+                self.seq = max(self.seq, int(match.group(1)))
+
+    def next_name(self):
+        with self.lock:
+            self.seq += 1
+            return f"{self.default_name}-{self.seq}"
+
+    def add(self, image_data, extension="jpg"):
+        """
+        Reserves a name for a new face and queues its encoded image to be written by the background writer.
+
+        Args:
+            image_data (bytes): Encoded image of the face.
+            extension (str): File extension of the encoded image.
+
+        Returns:
+            (str):  Name assigned to the face.
+        """
+
+        face_name = self.next_name()
+        file_name = f"{uuid.uuid4()}.{extension}"
+
+        with self.lock:
+            self.entries[face_name] = file_name
+            self.pending.add(face_name)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._write, daemon=True)
+                self.thread.start()
+
+        self.write_queue.put((face_name, file_name, image_data))
+        return face_name
+
+    def _write(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+
+            face_name, file_name, image_data = item
+            try:
+                os.makedirs(self.cache_folder, exist_ok=True)
+                with open(os.path.join(self.cache_folder, file_name), "wb") as fp:
+                    fp.write(image_data)
+
+                with open(self.journal_file, "a", encoding="UTF-8") as fp:
+                    fp.write(json.dumps({ "name": face_name, "file": file_name }) + "\n")
+
+                with self.lock:
+                    self.pending.discard(face_name)
+
+                self.journal_size += 1
+                if self.journal_size >= self.compact_every:
+                    self.compact()
+
+            except OSError:
+                self.logger.error(f"Unable to save {face_name} to the face cache")
+                with self.lock:
+                    self.entries.pop(face_name, None)
+                    self.pending.discard(face_name)
+
+    def compact(self):
+        """
+        Rewrites cache.yml with all faces written to disk and clears the journal.
+        """
+
+        with self.lock:
+            # Faces still queued for the writer are journaled once their image exists, after this compaction
+            data = { x: y for x, y in self.entries.items() if x not in self.pending }
+
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+
+            # Replace cache.yml atomically; replaying a journal that was not yet cleared is harmless
+            tmp_file = os.path.join(self.cache_folder, "cache.tmp.yml")
+            kenzy.settings.save(data, tmp_file)
+            os.replace(tmp_file, self.index_file)
+
+            if os.path.isfile(self.journal_file):
+                os.remove(self.journal_file)
+            self.journal_size = 0
+
+        except OSError:
+            self.logger.error(f"Unable to compact {self.index_file}")
+
+    def close(self):
+        """
+        Waits for queued faces to be written and compacts the journal.
+        """
+
+        if self.thread is not None and self.thread.is_alive():
+            self.write_queue.put(None)
+            self.thread.join()
+
+        if self.journal_size > 0:
+            self.compact()
@@ -0,0 +1,169 @@
+import logging
+import threading
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+
+class FrameHandle:
+    """
+    Reference to a frame stored in a FrameRing slot.  Consumers call retain() before handing the frame to another
+    consumer and release() when done; the slot is reused once every reference is released.
+
+    Args:
+        ring (FrameRing): Ring holding the frame.
+        slot (int): Slot index in the ring.
+        timestamp (float): Capture time of the frame.
+        camera (str): Camera identifier of the frame.
+    """
+
+    __slots__ = ("ring", "slot", "frame", "timestamp", "camera", "objects")
+
+    def __init__(self, ring, slot, timestamp=None, camera=None):
+        self.ring = ring
+        self.slot = slot
+        self.frame = ring.views[slot]
+        self.timestamp = timestamp
+        self.camera = camera
+        self.objects = None
+
+    def retain(self):
+        self.ring.retain(self.slot)
+        return self
+
+    def release(self):
+        self.ring.release(self.slot)
+
+
+class FrameRing:
+    """
+    Preallocated ring of frame slots with reference-counted handoff.  Capture writes into a free slot and consumers
+    share the slot through FrameHandle objects instead of receiving new arrays.
+
+    Args:
+        shape (tuple): Frame shape (height, width, channels).
+        slots (int): Number of frames held by the ring.
+        dtype (numpy.dtype): Frame data type.
+        shared (bool): Allocate the frames in shared memory so other processes can attach to the ring by name.
+    """
+
+    logger = logging.getLogger("FRAME-RING")
+
+    def __init__(self, shape, slots, dtype=np.uint8, shared=False):
+        self.shape = tuple(shape)
+        self.slots = max(1, int(slots))
+        self.dtype = np.dtype(dtype)
+        self.shm = None
+
+        size = self.slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        if shared and shared_memory is not None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.buffer = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+        else:
+            self.buffer = np.empty((self.slots,) + self.shape, dtype=self.dtype)
+
+        # One view per slot is created up front so handles don't allocate new array objects per frame
+        self.views = [self.buffer[x] for x in range(self.slots)]
+
+        self.refs = [0] * self.slots
+        self.free = list(range(self.slots - 1, -1, -1))
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def name(self):
+        return self.shm.name if self.shm is not None else None
+
+    def acquire(self, timestamp=None, camera=None):
+        """
+        Reserves a free slot for writing.
+
+        Returns:
+            (FrameHandle):  Handle with one reference or None when every slot is in use.
+        """
+
+        with self.lock:
+            if len(self.free) == 0:
+                self.dropped += 1
+                return None
+
+            slot = self.free.pop()
+            self.refs[slot] = 1
+
+        return FrameHandle(self, slot, timestamp=timestamp, camera=camera)
+
+    def write(self, frame, timestamp=None, camera=None):
+        """
+        Copies a frame into a free slot.
+
+        Returns:
+            (FrameHandle):  Handle with one reference or None when the ring is full or the frame doesn't fit.
+        """
+
+        if frame.shape != self.shape or frame.dtype != self.dtype:
+            return None
+
+        handle = self.acquire(timestamp=timestamp, camera=camera)
+        if handle is not None:
+            np.copyto(handle.frame, frame)
+
+        return handle
+
+    def retain(self, slot):
+        with self.lock:
+            self.refs[slot] += 1
+
+    def release(self, slot):
+        with self.lock:
+            if self.refs[slot] <= 0:
+                return
+
+            self.refs[slot] -= 1
+            if self.refs[slot] == 0:
+                self.free.append(slot)
+
+    def in_use(self):
+        with self.lock:
+            return self.slots - len(self.free)
+
+    def close(self):
+        """
+        Frees the shared memory block (if any).  Handles must not be used after the ring is closed.
+        """
+
+        if self.shm is not None:
+            self.views = []
+            self.buffer = None
+            # Unlink first; the mapping itself stays valid until handles still in flight are dropped
+            try:
+                self.shm.unlink()
+                self.shm.close()
+            except (OSError, BufferError):
+                pass
+
+            self.shm = None
+
+    @staticmethod
+    def attach(name, shape, slots, dtype=np.uint8):
+        """
+        Maps the frames of a shared ring created in another process.  Reference counts remain with the owning process.
+
+        Returns:
+            (tuple):  SharedMemory block (keep it open while the frames are used) and the array of all slots.
+        """
+
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 registers attached blocks with the resource tracker, which would unlink them a second time
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except (ImportError, AttributeError):
+                pass
+
+        return shm, np.ndarray((int(slots),) + tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf)
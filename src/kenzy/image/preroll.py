@@ -0,0 +1,174 @@
+import collections
+import logging
+import math
+import sys
+import threading
+import time
+import cv2
+
+
+class PrerollBuffer:
+    """
+    Pre-roll of the most recent frames kept as JPEG images.  Frames are handed over as ring handles and encoded on a
+    background thread so the capture loop never waits on the encoder; the ring slot is released as soon as the frame
+    is encoded.  The buffer is bounded by both its duration and a memory budget.
+
+    Args:
+        seconds (float): Seconds of video to keep.
+        frames_per_second (float): Capture rate of the camera.
+        memory_limit (int): Maximum bytes of encoded frames to keep.
+        quality (int): JPEG quality (0-100).
+        max_pending (int): Frames waiting for the encoder before new frames are dropped (None allows one second).
+    """
+
+    logger = logging.getLogger("KNZY-PREROLL")
+
+    def __init__(self, seconds=5, frames_per_second=30, memory_limit=64 * 1024 * 1024, quality=90, max_pending=None):
+        self.max_frames = max(0, int(frames_per_second * seconds))
+        self.memory_limit = max(0, int(memory_limit))
+        self.quality = int(quality)
+        self.max_pending = int(max_pending) if max_pending is not None else max(1, int(math.ceil(frames_per_second)))
+
+        self.frames = collections.deque()
+        self.size = 0
+        self.pending = collections.deque()
+        self.busy = False
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.dropped = 0
+        self.evicted = 0
+
+    @property
+    def enabled(self):
+        return self.max_frames > 0 and self.memory_limit > 0
+
+    def start(self):
+        self.clear()
+        if not self.enabled:
+            return
+
+        with self.cond:
+            self.running = True
+            self.dropped = 0
+            self.evicted = 0
+
+        self.thread = threading.Thread(target=self._encode, daemon=True)
+        self.thread.start()
+
+    def put(self, handle):
+        """
+        Queues a frame for the pre-roll.  The buffer takes over the caller's reference to the handle.
+
+        Returns:
+            (bool):  True if the frame was queued or False if it was dropped.
+        """
+
+        with self.cond:
+            if self.running and len(self.pending) < self.max_pending:
+                self.pending.append(handle)
+                self.cond.notify_all()
+                return True
+
+            if self.running:
+                self.dropped += 1
+
+        handle.release()
+        return False
+
+    def _encode(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+
+        while True:
+            with self.cond:
+                while self.running and len(self.pending) == 0:
+                    self.cond.wait()
+
+                if not self.running:
+                    break
+
+                handle = self.pending.popleft()
+                self.busy = True
+
+            ret = False
+            try:
+                ret, data = cv2.imencode(".jpg", handle.frame, params)
+            except Exception:
+                self.logger.error(str(sys.exc_info()[0]))
+
+            timestamp = handle.timestamp
+            handle.release()
+
+            with self.cond:
+                if ret:
+                    self.frames.append((timestamp, data))
+                    self.size += data.nbytes
+
+                    while len(self.frames) > 0 and (len(self.frames) > self.max_frames or self.size > self.memory_limit):
+                        self.size -= self.frames.popleft()[1].nbytes
+                        self.evicted += 1
+
+                self.busy = False
+                self.cond.notify_all()
+
+    def drain(self, timeout=1.0):
+        """
+        Waits for queued frames to be encoded and empties the buffer.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the encoder.
+
+        Returns:
+            (list):  Encoded frames as (timestamp, JPEG bytes) tuples, oldest first.
+        """
+
+        end_time = time.time() + timeout
+        with self.cond:
+            while self.running and (self.busy or len(self.pending) > 0):
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    break
+
+                self.cond.wait(remaining)
+
+            ret = list(self.frames)
+            self.frames.clear()
+            self.size = 0
+
+        return ret
+
+    def clear(self):
+        with self.cond:
+            pending = list(self.pending)
+            self.pending.clear()
+            self.frames.clear()
+            self.size = 0
+
+        for handle in pending:
+            handle.release()
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join()
+
+        self.thread = None
+        self.clear()
+
+    def get_stats(self):
+        with self.cond:
+            return {
+                "frames": len(self.frames),
+                "bytes": self.size,
+                "memory_limit": self.memory_limit,
+                "pending": len(self.pending),
+                "dropped": self.dropped,
+                "evicted": self.evicted
+            }
+
+    @staticmethod
+    def decode(data):
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
@@ -0,0 +1,174 @@
+import collections
+import threading
+import time
+
+
+def _release(item):
+    if hasattr(item, "release"):
+        item.release()
+
+
+class LatestSlot:
+    """
+    Latest-wins handoff to a stage.  Each key (camera) holds only its newest items so a stage always works on the
+    freshest frames; an item pushed out before the stage takes it is released and counted as dropped.
+
+    Args:
+        depth (int): Newest items kept per key (1 keeps only the latest frame).
+    """
+
+    def __init__(self, depth=1):
+        self.items = collections.OrderedDict()
+        self.depth = max(1, int(depth))
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def open(self, depth=None):
+        with self.cond:
+            self.closed = False
+            self.dropped = 0
+            if depth is not None:
+                self.depth = max(1, int(depth))
+
+    def put(self, key, item):
+        with self.cond:
+            if self.closed:
+                _release(item)
+                return False
+
+            waiting = self.items.get(key)
+            if waiting is None:
+                # New keys go to the end so the camera waiting longest is served first
+                waiting = collections.deque()
+                self.items[key] = waiting
+
+            waiting.append(item)
+            while len(waiting) > self.depth:
+                self.dropped += 1
+                _release(waiting.popleft())
+
+            self.cond.notify()
+
+        return True
+
+    def get(self, max_items=1):
+        """
+        Waits for new items.
+
+        Args:
+            max_items (int): Maximum number of items (one per key) to return.
+
+        Returns:
+            (list):  Waiting items taken from the keys in turn (oldest first within a key) or None once the slot is closed.
+        """
+
+        with self.cond:
+            while len(self.items) == 0 and not self.closed:
+                self.cond.wait()
+
+            if self.closed:
+                return None
+
+            ret = []
+            while len(self.items) > 0 and len(ret) < max_items:
+                key, waiting = next(iter(self.items.items()))
+                ret.append(waiting.popleft())
+                if len(waiting) == 0:
+                    del self.items[key]
+                else:
+                    self.items.move_to_end(key)
+
+            return ret
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            for waiting in self.items.values():
+                for item in waiting:
+                    _release(item)
+
+            self.items.clear()
+            self.cond.notify_all()
+
+
+class StageScheduler:
+    """
+    Paces a stage to a target analysis rate and keeps smoothed (EWMA) latency and throughput for it.
+
+    Args:
+        target_fps (float): Maximum analysis rate for the stage (0 runs as fast as new frames arrive).
+        alpha (float): Smoothing factor for the moving averages.
+    """
+
+    def __init__(self, target_fps=0, alpha=0.2):
+        self.target_fps = float(target_fps) if target_fps is not None else 0.0
+        self.alpha = float(alpha)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.latency = None
+            self.interval = None
+            self.run_frames = None
+            self.processed = 0
+            self.last_end = None
+            self.next_start = 0
+
+    def wait(self, stop_event=None):
+        """
+        Blocks until the stage may start its next run under the target rate.  Shared by all threads of a stage so
+        runs are spaced evenly no matter which thread takes them.
+        """
+
+        if self.target_fps <= 0:
+            return
+
+        with self.lock:
+            now = time.time()
+            start = max(now, self.next_start)
+            self.next_start = start + (1.0 / self.target_fps)
+
+        if start > now:
+            if stop_event is not None:
+                stop_event.wait(start - now)
+            else:
+                time.sleep(start - now)
+
+    def end(self, started, frames=1):
+        """
+        Records a completed run.
+
+        Args:
+            started (float): Time the run started.
+            frames (int): Frames analyzed in the run.
+        """
+
+        now = time.time()
+        with self.lock:
+            latency = now - started
+            self.latency = latency if self.latency is None else (self.alpha * latency) + ((1 - self.alpha) * self.latency)
+
+            # Interval and frames per run are averaged separately so bursts of short intervals don't inflate the rate
+            if self.last_end is not None:
+                interval = now - self.last_end
+                self.interval = interval if self.interval is None else (self.alpha * interval) + ((1 - self.alpha) * self.interval)
+                self.run_frames = frames if self.run_frames is None else (self.alpha * frames) + ((1 - self.alpha) * self.run_frames)
+
+            self.last_end = now
+            self.processed += frames
+
+    def get_stats(self, dropped=0):
+        with self.lock:
+            fps = 0.0
+            if self.interval is not None and self.interval > 0:
+                fps = self.run_frames / self.interval
+
+            return {
+                "target_fps": self.target_fps,
+                "fps": round(fps, 2),
+                "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else 0.0,
+                "processed": self.processed,
+                "dropped": dropped
+            }
@@ -0,0 +1,288 @@
+import logging
+import multiprocessing as mp
+import sys
+import traceback
+import numpy as np
+from kenzy.image.frames import FrameRing
+
+
+def frame_ref(handle, box=None):
+    """
+    Describes a frame (or a crop of it) so a worker process can read it from the shared frame ring.
+
+    Args:
+        handle (FrameHandle): Handle of the frame in the ring.
+        box (tuple): Optional (left, top, right, bottom) crop.
+
+    Returns:
+        (dict):  Reference to the shared slot or, if the ring is not shared, the pixels themselves.
+    """
+
+    ring = handle.ring
+    if ring.name is None:
+        image = handle.frame if box is None else handle.frame[box[1]:box[3], box[0]:box[2]]
+        return { "image": np.ascontiguousarray(image) }
+
+    return { "ring": ring.name, "shape": ring.shape, "slots": ring.slots, "dtype": ring.dtype.str, "slot": handle.slot, "box": box }
+
+
+class SharedFrames:
+    """
+    Worker-side view of the frame rings created by the cameras in the parent process.
+    """
+
+    def __init__(self, max_rings=8):
+        self.max_rings = max_rings
+        self.rings = {}
+
+    def get(self, ref):
+        if "image" in ref:
+            return ref["image"]
+
+        if ref["ring"] not in self.rings:
+            # Rings are replaced when a camera's frame size changes so only the most recent ones are kept mapped
+            while len(self.rings) >= self.max_rings:
+                self._close(next(iter(self.rings)))
+
+            self.rings[ref["ring"]] = FrameRing.attach(ref["ring"], ref["shape"], ref["slots"], dtype=ref["dtype"])
+
+        image = self.rings[ref["ring"]][1][ref["slot"]]
+        box = ref.get("box")
+        if box is not None:
+            image = image[box[1]:box[3], box[0]:box[2]]
+
+        return image
+
+    def _close(self, name):
+        shm, frames = self.rings.pop(name)
+        del frames
+        try:
+            shm.close()
+        except (OSError, BufferError):
+            pass
+
+    def close(self):
+        for name in list(self.rings.keys()):
+            self._close(name)
+
+
+class ObjectStage:
+    """
+    Object detection stage run inside a worker process.
+
+    Args:
+        model_type (str): Object model type (ssd, yolo, onnx or any registered backend).
+        model_config (str): Model configuration file.
+        model_file (str): Model weights file.
+        label_file (str): Labels file.
+        threshold (float): Minimum confidence for detections.
+        batch_size (int): Frames per forward pass.
+        options (dict): Backend specific options.
+        classes (list): Class names to keep (None keeps all classes).
+    """
+
+    def __init__(self, model_type="ssd", model_config=None, model_file=None, label_file=None, threshold=0.6, batch_size=1, options=None,
+                 classes=None):
+        from kenzy.image.core import object_labels, object_model
+
+        self.threshold = threshold
+        self.classes = classes
+        self.labels = object_labels(label_file=label_file, model_type=model_type)
+        self.model = object_model(model_type=model_type, model_config=model_config, model_file=model_file, batch_size=batch_size,
+                                  options=options)
+
+    def run(self, frames, payload):
+        from kenzy.image.core import object_detection_batch
+
+        images = [frames.get(x) for x in payload.get("frames", [])]
+        if len(images) == 0:
+            return []
+
+        return object_detection_batch(images=images, model=self.model, labels=self.labels, threshold=self.threshold, classes=self.classes,
+                                      structured=True)
+
+
+class FaceStage:
+    """
+    Face location and encoding stage run inside a worker process.  Matching against known faces stays in the parent
+    since the gallery, trackers and face cache are shared across cameras.
+
+    Args:
+        model (str): Face location model (hog or cnn).
+    """
+
+    def __init__(self, model="hog"):
+        self.model = model
+
+    def run(self, frames, payload):
+        import face_recognition
+        from kenzy.image.core import get_face_locations, image_resize
+
+        image = image_resize(frames.get(payload["frame"]), payload.get("scale", 1.0))
+        locations = get_face_locations(image, model=self.model, regions=payload.get("regions"))
+        if locations is None or len(locations) == 0:
+            return [], []
+
+        encodings = []
+        if payload.get("encode", True):
+            encodings = face_recognition.face_encodings(image, locations)
+
+        return locations, encodings
+
+
+STAGES = {
+    "object": ObjectStage,
+    "face": FaceStage
+}
+
+
+def _run_worker(stage, settings, conn):
+    logger = logging.getLogger("KNZY-WORKER")
+    frames = SharedFrames()
+
+    try:
+        handler = STAGES[stage](**settings)
+        conn.send(("ready", None))
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+        return
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError, KeyboardInterrupt):
+            break
+
+        if msg is None:
+            break
+
+        try:
+            conn.send(("ok", handler.run(frames, msg)))
+        except Exception:
+            logger.debug(str(sys.exc_info()[0]))
+            conn.send(("error", traceback.format_exc()))
+
+    frames.close()
+
+
+class StageWorker:
+    """
+    Worker process for one inference stage connected to the parent by a pipe.  Each worker handles one request at
+    a time so a slow stage holds back its dispatcher; the stage's LatestSlot keeps only the newest frame per camera
+    meanwhile instead of piling up work.
+
+    Args:
+        stage (str): Stage name ("object" or "face").
+        settings (dict): Keyword arguments for the stage.
+    """
+
+    logger = logging.getLogger("KNZY-WORKER")
+
+    def __init__(self, stage, settings=None):
+        self.stage = stage
+        self.settings = settings if settings is not None else {}
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.failed = False
+
+    def start(self):
+        # Workers are started before the cameras so the only state they inherit is the loaded settings
+        self.ready = False
+        self.conn, child_conn = mp.Pipe()
+        self.process = mp.Process(target=_run_worker, args=(self.stage, self.settings, child_conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def send(self, payload):
+        """
+        Sends a request to the worker, restarting it first if it has exited.
+
+        Returns:
+            (bool):  True if the request was sent or False if the worker could not be reached.
+        """
+
+        if not self.is_alive():
+            self.logger.warning(f"Restarting {self.stage} worker")
+            self.start()
+
+        try:
+            self.conn.send(payload)
+        except (OSError, ValueError):
+            # The worker exited after the liveness check; the next request restarts it
+            self.logger.error(f"Unable to send to {self.stage} worker")
+            self.stop()
+            return False
+
+        return True
+
+    def receive(self):
+        """
+        Waits for the result of the last request.
+
+        Returns:
+            Result of the stage or None if the worker failed.
+        """
+
+        try:
+            while True:
+                while not self.conn.poll(1.0):
+                    if not self.process.is_alive():
+                        raise EOFError("Worker exited")
+
+                status, data = self.conn.recv()
+                if status == "ready":
+                    self.ready = True
+                    continue
+
+                if status == "error" and not self.ready:
+                    # The stage could not be loaded (e.g. missing model) so restarting would fail the same way
+                    self.logger.error(f"Unable to start {self.stage} worker: {data}")
+                    self.failed = True
+                    self.stop()
+                    return None
+
+                if status == "error":
+                    self.logger.error(f"{self.stage} worker error: {data}")
+                    return None
+
+                return data
+
+        except (EOFError, OSError):
+            self.logger.error(f"{self.stage} worker stopped unexpectedly")
+            self.stop()
+            return None
+
+    def request(self, payload):
+        if self.failed:
+            return None
+
+        if not self.send(payload):
+            return None
+
+        return self.receive()
+
+    def stop(self, timeout=5):
+        if self.process is None:
+            return
+
+        try:
+            if self.process.is_alive():
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+        self.process = None
+        self.conn = None
@@ -148,25 +148,24 @@ class SkillManager:
     
     def audio_fallback(self, in_text, context, raw=None):
         if isinstance(self.service.remote_devices, dict):
-            for dev_url in self.service.remote_devices:
-                if "fallback" in self.service.remote_devices[dev_url].get("accepts", []):
-                    # Send fallback to this device and return
-                    
-                    data = {
-                        "command": {
-                            "action": "fallback",
-                            "payload": {
-                                "text": in_text,
-                                "raw": raw,
-                                "context": context.get()
-                            }
-                        },
-                        "url": dev_url
-                    }
-
-                    ret = self.device.relay(data=data)
-                    self.logger.debug(f"FALLBACK returned {ret.status}")
-                    return False
+            for dev_url in self.service.remote_devices.find(action="fallback"):
+                # Send fallback to this device and return
+                
+                data = {
+                    "command": {
+                        "action": "fallback",
+                        "payload": {
+                            "text": in_text,
+                            "raw": raw,
+                            "context": context.get()
+                        }
+                    },
+                    "url": dev_url
+                }
+
+                ret = self.device.relay(data=data)
+                self.logger.debug(f"FALLBACK returned {ret.status}")
+                return False
 
         self.logger.debug(f"fallback: {in_text}")
         return False
@@ -60,7 +60,7 @@ class SkillsDevice:
 
     @property
     def accepts(self):
-        return ["status", "get_settings", "set_settings", "collect", "download_skill", "relay"]
+        return ["status", "get_settings", "set_settings", "collect", "collect_batch", "download_skill", "relay"]
     
     def is_alive(self, **kwargs):
         return True
@@ -128,6 +128,29 @@ class SkillsDevice:
 
         return KenzySuccessResponse("Collect complete")
     
+    def collect_batch(self, **kwargs):
+        data = kwargs.get("data", {})
+        if not isinstance(data, dict) or not isinstance(data.get("events"), list):
+            return KenzyErrorResponse("Invalid batch")
+
+        # Events are replayed in the order they were collected on the sending device
+        skipped = 0
+        for event in data.get("events"):
+            if not isinstance(event, dict):
+                skipped += 1
+                continue
+
+            context = kwargs.get("context")
+            if isinstance(event.get("context"), dict):
+                context = KenzyContext.from_dict(event.get("context"))
+
+            self.collect(data=event.get("data", {}), context=context)
+
+        if skipped > 0:
+            self.logger.warning(f"Skipped {skipped} invalid event(s) in collect batch")
+
+        return KenzySuccessResponse("Collect batch complete")
+
     def start(self, **kwargs):
         return KenzySuccessResponse("Skill Manager started")
     
@@ -0,0 +1,307 @@
+import logging
+import multiprocessing as mp
+import queue
+import sys
+import threading
+import time
+import traceback
+import uuid
+from urllib.parse import urlsplit
+from .core import KenzyContext, KenzyErrorResponse, KenzyResponse
+from .extras import get_local_ip_address
+
+
+class LocalTransport:
+    """
+    In-host transport for devices started by the same Supervisor.  Each device process owns one inbox queue
+    (keyed by its service port) and requests/responses are exchanged as plain dictionaries instead of HTTP.
+
+    Args:
+        inboxes (dict): Service port to multiprocessing.Queue for every device under the supervisor.
+        port (int): Service port of the local device.
+        timeout (float): Default seconds to wait for a response.
+    """
+
+    logger = logging.getLogger("LOCAL-TX")
+
+    def __init__(self, inboxes, port, timeout=30):
+        self.inboxes = inboxes
+        self.port = int(port)
+        self.timeout = float(timeout)
+        self.server = None
+        self.pending = {}
+        self.down = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+        self.local_hosts = ["127.0.0.1", "localhost", "0.0.0.0"]
+        try:
+            ip_addr = get_local_ip_address()
+            if ip_addr is not None:
+                self.local_hosts.append(ip_addr)
+        except Exception:
+            pass
+
+    def has(self, url):
+        try:
+            parts = urlsplit(str(url))
+            return parts.hostname in self.local_hosts and parts.port in self.inboxes
+        except ValueError:
+            return False
+
+    def start(self, server):
+        self.server = server
+        self.thread = threading.Thread(target=self._receive, daemon=True)
+        self.thread.start()
+
+        # Let peers that saw this device go down route to it again
+        for port, inbox in self.inboxes.items():
+            if port != self.port:
+                inbox.put({ "type": "up", "port": self.port })
+
+    def stop(self):
+        if self.thread is not None and self.thread.is_alive():
+            self.inboxes[self.port].put(None)
+            self.thread.join(5)
+
+    def _receive(self):
+        inbox = self.inboxes[self.port]
+
+        while True:
+            msg = inbox.get()
+            if msg is None or not isinstance(msg, dict):
+                break
+
+            if msg.get("type") == "response":
+                with self.lock:
+                    item = self.pending.get(msg.get("id"))
+
+                if item is not None:
+                    item["response"] = msg.get("data")
+                    item["event"].set()
+
+            elif msg.get("type") == "request":
+                self.server.thread_pool.submit(self._process, msg)
+
+            elif msg.get("type") == "down":
+                # The peer exited so requests it may have dequeued will never be answered
+                with self.lock:
+                    self.down.add(msg.get("port"))
+                    items = [x for x in self.pending.values() if x["port"] == msg.get("port")]
+
+                for item in items:
+                    item["event"].set()
+
+            elif msg.get("type") == "up":
+                with self.lock:
+                    self.down.discard(msg.get("port"))
+
+    def _process(self, msg):
+        data = msg.get("data", {})
+        headers = msg.get("headers", {})
+
+        try:
+            # Same check as KenzyHTTPServer.process_post so the in-host path can't bypass the API key
+            if not self.server.authenticate(headers.get("Authorization")):
+                response = KenzyResponse("failed", None, "Unauthorized")
+                self._reply(msg, response)
+                return
+
+            context = KenzyContext()
+            if isinstance(data.get("context"), dict):
+                context = KenzyContext.from_dict(data.get("context"))
+
+            response = self.server.command(data.get("action"), data.get("payload"), context)
+            if not isinstance(response, KenzyResponse):
+                response = KenzyErrorResponse("Unrecognized response from device.")
+
+        except Exception:
+            self.logger.debug(str(sys.exc_info()[0]))
+            self.logger.debug(str(traceback.format_exc()))
+            response = KenzyErrorResponse("An internal error occurred")
+
+        self._reply(msg, response)
+
+    def _reply(self, msg, response):
+        if msg.get("reply_to") in self.inboxes:
+            self.inboxes[msg.get("reply_to")].put({ "type": "response", "id": msg.get("id"), "data": response.get() })
+
+    def send(self, url, payload, timeout=None, headers=None):
+        """
+        Delivers a request to the device at url and waits for its response.
+
+        Args:
+            url (str): URL of the co-located device.
+            payload (dict): Request body.
+            timeout (float): Seconds to wait for the response (None uses the transport default).
+            headers (dict): Request headers (only Authorization is used).
+
+        Returns:
+            (dict):  Response body (same shape as the HTTP JSON response) or None on timeout or if the device is down.
+        """
+
+        port = urlsplit(str(url)).port
+        msg_id = str(uuid.uuid4())
+        item = { "event": threading.Event(), "response": None, "port": port }
+
+        with self.lock:
+            if port in self.down:
+                return None
+
+            self.pending[msg_id] = item
+
+        try:
+            auth = { "Authorization": headers.get("Authorization") } if isinstance(headers, dict) else {}
+            self.inboxes[port].put({ "type": "request", "id": msg_id, "reply_to": self.port, "data": payload, "headers": auth })
+            if not item["event"].wait(timeout if timeout is not None else self.timeout):
+                return None
+        finally:
+            with self.lock:
+                self.pending.pop(msg_id, None)
+
+        return item["response"]
+
+
+class Supervisor:
+    """
+    Starts one process per device, restarts crashed devices with exponential backoff, and links the devices
+    with a LocalTransport so co-located devices skip HTTP.
+
+    Args:
+        target (callable): Function started in each child as target(cfg, local_inboxes=...).
+        restart (bool): Restart devices that exit with a non-zero exit code.
+        backoff (float): Initial delay in seconds before restarting a crashed device.
+        backoff_max (float): Maximum delay in seconds between restarts.
+        stable_time (float): Seconds a device must run before its backoff is reset.
+        transport (str): "local" to enable in-host transport or "http" to disable it.
+    """
+
+    logger = logging.getLogger("SUPERVISOR")
+
+    def __init__(self, target, restart=True, backoff=1.0, backoff_max=60, stable_time=60, transport="local"):
+        self.target = target
+        self.restart = restart
+        self.backoff = float(backoff)
+        self.backoff_max = float(backoff_max)
+        self.stable_time = float(stable_time)
+        self.transport = str(transport).lower().strip()
+        self.children = []
+        self.inboxes = {}
+        self.stop_event = threading.Event()
+
+    def add(self, name, cfg, delay=0):
+        """
+        Registers a device.  All devices must be added before start() so every process receives the full inbox map.
+
+        Args:
+            name (str): Name of the device group in the configuration.
+            cfg (dict): Device configuration passed to the target.
+            delay (float): Seconds to wait after the initial start before starting the next device.
+        """
+
+        port = int(cfg.get("service", {}).get("port"))
+        if self.transport == "local":
+            self.inboxes[port] = mp.Queue()
+
+        self.children.append({
+            "name": name,
+            "cfg": cfg,
+            "delay": float(delay),
+            "port": port,
+            "process": None,
+            "started": 0,
+            "failures": 0,
+            "restart_at": None
+        })
+
+    def _spawn(self, child):
+        kwargs = { "local_inboxes": self.inboxes } if self.transport == "local" else {}
+
+        child["process"] = mp.Process(target=self.target, args=[child["cfg"]], kwargs=kwargs)
+        child["process"].start()
+        child["started"] = time.time()
+        child["restart_at"] = None
+        child["notified"] = False
+
+        self.logger.debug(f"Started {child['name']} (pid={child['process'].pid})")
+
+    def start(self):
+        for child in self.children:
+            self._spawn(child)
+            if child["delay"] > 0:
+                time.sleep(child["delay"])
+
+    def run(self):
+        """
+        Monitors the device processes until all have exited cleanly or stop() is called.
+        """
+
+        try:
+            while not self.stop_event.is_set():
+                alive = False
+                now = time.time()
+
+                for child in self.children:
+                    proc = child["process"]
+                    if proc is None:
+                        continue
+
+                    if proc.is_alive():
+                        alive = True
+                        continue
+
+                    if not child.get("notified"):
+                        self._notify_down(child)
+                        child["notified"] = True
+
+                    if proc.exitcode == 0 or not self.restart:
+                        continue
+
+                    alive = True
+                    if child["restart_at"] is None:
+                        if now - child["started"] > self.stable_time:
+                            child["failures"] = 0
+
+                        child["failures"] += 1
+                        delay = min(self.backoff * (2 ** (child["failures"] - 1)), self.backoff_max)
+                        child["restart_at"] = now + delay
+
+                        self.logger.warning(f"{child['name']} exited with code {proc.exitcode}; restarting in {delay:.1f}s")
+
+                    elif now >= child["restart_at"]:
+                        self._spawn(child)
+
+                if not alive:
+                    break
+
+                self.stop_event.wait(0.5)
+
+        except KeyboardInterrupt:
+            pass
+
+        self.stop()
+
+    def _notify_down(self, child):
+        # Fails requests other devices are still waiting on; the child announces itself again when it restarts
+        for port, inbox in self.inboxes.items():
+            if port != child["port"]:
+                try:
+                    inbox.put({ "type": "down", "port": child["port"] })
+                except (OSError, ValueError):
+                    pass
+
+    def stop(self, timeout=10):
+        self.stop_event.set()
+
+        for child in self.children:
+            proc = child["process"]
+            if proc is not None and proc.is_alive():
+                proc.join(timeout)
+                if proc.is_alive():
+                    proc.terminate()
+
+        for port in self.inboxes:
+            try:
+                self.inboxes[port].close()
+            except (OSError, ValueError, queue.Full):
+                pass